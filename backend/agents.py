@@ -1,19 +1,33 @@
 import json, os
 from typing import Dict, List
+import threading
 import pandas as pd
-import google.generativeai as genai
 from dotenv import load_dotenv
 from helpers import vibe_match, haversine, estimate_visit_time, weather_score
+import outbound
 
 # -------------------------------------------------
 # CONFIG
 # -------------------------------------------------
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 MODEL_NAME = "models/gemini-flash-latest"
 
 SYSTEM_PROMPT_NARRATOR = "Explain the plan clearly and briefly."
 
+# The Gemini SDK takes most of the app's import time; load it on first use
+_genai = None
+_genai_lock = threading.Lock()
+
+def get_genai():
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+                _genai = genai
+    return _genai
+
 # -------------------------------------------------
 # AGENT 1: INTENT PARSER
 # -------------------------------------------------
@@ -147,17 +161,25 @@ def apply_edit_instruction(plan: List[Dict], instruction: Dict) -> List[Dict]:
 # AGENT 5: NARRATION
 # -------------------------------------------------
 
+def _narrate(prompt: str) -> str:
+    model = get_genai().GenerativeModel(
+        MODEL_NAME,
+        system_instruction=SYSTEM_PROMPT_NARRATOR
+    )
+    res = outbound.call(
+        "gemini", model.generate_content, prompt,
+        request_options={"timeout": outbound.timeout_for("gemini")}
+    )
+    return res.text.strip()
+
 def agent_5_plan_narrator(intent: Dict, plan: List[Dict]) -> str:
     if not plan:
         return "No suitable places found."
 
     try:
-        model = genai.GenerativeModel(
-            MODEL_NAME,
-            system_instruction=SYSTEM_PROMPT_NARRATOR
-        )
-        res = model.generate_content(json.dumps(plan))
-        return res.text.strip()
-    except:
+        prompt = json.dumps(plan)
+        # Identical plans narrated concurrently (e.g. a shared link) share one call
+        return outbound.coalesce("gemini", prompt, _narrate, prompt)
+    except Exception:
         names = ", ".join(p["place_name"] for p in plan)
         return f"We’ve created a balanced plan featuring {names}."
@@ -0,0 +1,91 @@
+import os
+import threading
+from typing import Callable, List
+from metrics import RANKING_BATCH_SIZE
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+
+# How long the first request of a batch waits for others (0 disables batching)
+BATCH_WINDOW_MS = float(os.getenv("SANCHAR_BATCH_WINDOW_MS", "2"))
+# A batch is flushed early once it holds this many requests
+BATCH_MAX_REQUESTS = int(os.getenv("SANCHAR_BATCH_MAX_REQUESTS", "64"))
+
+# -----------------------------
+# MICRO-BATCHER
+# -----------------------------
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+class MicroBatcher:
+    """
+    Groups concurrent submit() calls into one run_batch(items) call.
+
+    The first caller of a batch is its leader: it waits up to window_s (or
+    until max_items have joined) and for the previous batch to finish, then
+    runs the batch on its own thread and hands each follower its result.
+    Requests arriving while a batch runs therefore form the next one. The
+    window is only waited out when another submit is in flight, so a lone
+    request (including back-to-back sequential ones) runs immediately.
+    """
+
+    def __init__(self, run_batch: Callable[[List], List], window_s: float, max_items: int,
+                 label: str = "thread"):
+        self.run_batch = run_batch
+        self.window_s = window_s
+        self.max_items = max_items
+        self.label = label
+        self._lock = threading.Lock()
+        self._running = threading.Lock()
+        self._open = None
+        self._in_flight = 0  # submits queued or running, across all batches
+
+    def submit(self, item):
+        with self._lock:
+            busy = self._in_flight > 0
+            self._in_flight += 1
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_items:
+                self._open = None
+                batch.full.set()
+
+        try:
+            if leader:
+                return self._lead(batch, busy)
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return batch.results[index]
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _lead(self, batch: _Batch, busy: bool):
+        # A running batch already collects the next one while we queue behind it
+        if busy and not self._running.locked():
+            batch.full.wait(self.window_s)
+        with self._running:
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            RANKING_BATCH_SIZE.observe(len(batch.items), mode=self.label)
+            try:
+                batch.results = self.run_batch(batch.items)
+            except Exception as e:
+                batch.error = e
+                raise
+            finally:
+                batch.done.set()
+        return batch.results[0]
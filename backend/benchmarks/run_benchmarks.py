@@ -0,0 +1,400 @@
+"""
+Benchmark harness for the recommendation and chat pipelines.
+
+Synthesizes place catalogs around Bengaluru, replays a mixed /chat workload
+against EnhancedRAGPipeline (and the legacy pipeline.generate_hangout_plan)
+with every LLM / geocoding call stubbed, and reports latency percentiles,
+throughput and peak memory. Each scenario runs in a fresh process so peak
+RSS is per scenario.
+
+    cd backend
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 --json bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json
+    python benchmarks/run_benchmarks.py --startup-only --max-import-seconds 1.5
+    python benchmarks/run_benchmarks.py --compare-executors --sizes 100000 --concurrency 16
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Bengaluru city centre; synthetic places cluster around it
+CENTER_LAT, CENTER_LON = 12.9716, 77.5946
+
+MOODS = ["chill", "fun", "romantic", "adventure"]
+BUDGETS = ["low", "medium", "high"]
+TIMES = ["1-2", "2-4", "half-day", "full-day"]
+CATEGORY_WORDS = ["cafe", "park", "temple", "bar", "restaurant", "lake"]
+
+# Share of each follow-up kind in the replayed /chat workload
+WORKLOAD_MIX = {
+    "initial_plan": 0.30,
+    "category_filter": 0.15,
+    "exclude_category": 0.15,
+    "visited_replacement": 0.15,
+    "regenerate_all": 0.10,
+    "radius_change": 0.15
+}
+
+# -------------------------
+# SYNTHETIC CATALOG
+# -------------------------
+def synthesize_catalog(size: int, seed: int):
+    """Catalog with the real CSV's column layout and value distributions"""
+    import numpy as np
+    import pandas as pd
+    from helpers import load_places_data
+
+    rng = np.random.default_rng(seed)
+    real = pd.DataFrame(load_places_data())
+    sample = real.sample(n=size, replace=True, random_state=seed).reset_index(drop=True)
+
+    # 70% dense around the centre, 30% spread across the metro region
+    dense = rng.random(size) < 0.7
+    lat = np.where(dense, rng.normal(CENTER_LAT, 0.08, size), rng.uniform(12.6, 13.3, size))
+    lon = np.where(dense, rng.normal(CENTER_LON, 0.08, size), rng.uniform(77.2, 77.9, size))
+
+    ids = np.arange(size).astype(str)
+    sample["place_id"] = np.char.add("synthetic-", ids)
+    sample["place_name"] = sample["place_name"].astype(str) + " #" + ids
+    sample["latitude"] = lat.round(6)
+    sample["longitude"] = lon.round(6)
+    return sample
+
+# -------------------------
+# WORKLOADS
+# -------------------------
+def random_profile(pipeline, rng: random.Random) -> dict:
+    return pipeline.create_user_profile_json(
+        mood=rng.choice(MOODS),
+        budget=rng.choice(BUDGETS),
+        time=rng.choice(TIMES),
+        lat=CENTER_LAT + rng.gauss(0, 0.1),
+        lon=CENTER_LON + rng.gauss(0, 0.1),
+        use_current_location=rng.random() < 0.5
+    )
+
+def enhanced_request(pipeline, rng: random.Random):
+    """One /chat turn: an initial plan, or a follow-up on a fresh plan"""
+    kind = rng.choices(list(WORKLOAD_MIX), weights=list(WORKLOAD_MIX.values()))[0]
+    profile = random_profile(pipeline, rng)
+
+    if kind == "initial_plan":
+        return kind, lambda: pipeline.generate_recommendations(profile)
+
+    # Follow-ups need a plan in place; that setup is not timed
+    session = {}
+    base = pipeline.generate_recommendations(profile, session)
+    profile, recommendations = base["user_profile"], base["recommendations"]
+
+    if kind == "radius_change":
+        def run():
+            profile["location"]["search_radius_km"] = rng.choice([1.0, 3.0, 7.5, 15.0, 30.0])
+            return pipeline.generate_recommendations(profile, session)
+        return kind, run
+
+    if kind == "category_filter":
+        command = f"category:{rng.choice(CATEGORY_WORDS)}"
+    elif kind == "exclude_category":
+        command = f"exclude_category:{rng.choice(CATEGORY_WORDS)}"
+    elif kind == "visited_replacement" and recommendations:
+        command = f"i've visited {rng.choice(recommendations)['place_name'].lower()}"
+    else:
+        command = "regenerate_all"
+
+    def run():
+        pipeline.analyze_with_groq = lambda message, recs: command
+        return pipeline.handle_chat_modification(profile, recommendations, command, session)
+    return kind, run
+
+def legacy_request(rng: random.Random):
+    from agents import agent_1_intent_builder
+    import pipeline as legacy
+
+    message = f"{rng.choice(['romantic', 'fun', 'relaxed'])} {rng.choice(['cheap', 'premium', ''])} 2-4"
+    intent = agent_1_intent_builder({"message": message})
+    if rng.random() < 0.3:
+        intent["preferred_location"] = "MG Road, Bengaluru"
+    lat = CENTER_LAT + rng.gauss(0, 0.1)
+    lon = CENTER_LON + rng.gauss(0, 0.1)
+    return "legacy_plan", lambda: legacy.generate_hangout_plan(intent, lat, lon)
+
+# -------------------------
+# SCENARIO RUNNER (CHILD PROCESS)
+# -------------------------
+def run_scenario(target: str, size: int, requests: int, seed: int, use_cache: bool) -> dict:
+    import numpy as np
+    import agents
+    import enhanced_pipeline
+    import pipeline as legacy
+
+    catalog = synthesize_catalog(size, seed)
+
+    # Stub every outbound call so only local compute is measured
+    stub_narration = lambda intent, plan: "stub narration"
+    agents.agent_5_plan_narrator = stub_narration
+    enhanced_pipeline.agent_5_plan_narrator = stub_narration
+    legacy.agent_5_plan_narrator = stub_narration
+    legacy.geocode_place = lambda name: (12.9758, 77.6033)
+    enhanced_pipeline.load_places_data = lambda: catalog
+    legacy.load_places_data = lambda: catalog
+
+    load_start = time.perf_counter()
+    pipeline = enhanced_pipeline.EnhancedRAGPipeline()
+    load_seconds = time.perf_counter() - load_start
+    if not use_cache:
+        pipeline.result_cache.max_entries = 0
+
+    rng = random.Random(seed)
+    latencies = {}
+    started = time.perf_counter()
+    for _ in range(requests):
+        kind, run = legacy_request(rng) if target == "legacy" else enhanced_request(pipeline, rng)
+        t0 = time.perf_counter()
+        run()
+        latencies.setdefault(kind, []).append(time.perf_counter() - t0)
+    wall = time.perf_counter() - started
+
+    def summarize(values):
+        ms = np.array(values) * 1000
+        return {
+            "count": len(values),
+            "p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p90_ms": round(float(np.percentile(ms, 90)), 3),
+            "p99_ms": round(float(np.percentile(ms, 99)), 3),
+            "mean_ms": round(float(ms.mean()), 3)
+        }
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    return {
+        "target": target,
+        "size": size,
+        "requests": requests,
+        "cache": use_cache,
+        "load_seconds": round(load_seconds, 3),
+        "throughput_rps": round(len(all_latencies) / sum(all_latencies), 2),
+        "wall_seconds": round(wall, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "overall": summarize(all_latencies),
+        "by_kind": {kind: summarize(values) for kind, values in sorted(latencies.items())}
+    }
+
+def run_isolated(*args) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_scenario, args)
+
+# -------------------------
+# THREAD VS PROCESS EXECUTOR
+# -------------------------
+def run_executor_scenario(mode: str, size: int, requests: int, concurrency: int,
+                          processes: int, seed: int) -> dict:
+    """Concurrent uncached generate_recommendations calls, ranked in threads or worker processes"""
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    import numpy as np
+    import agents
+    import enhanced_pipeline
+    import executor
+
+    catalog = synthesize_catalog(size, seed)
+    stub_narration = lambda intent, plan: "stub narration"
+    agents.agent_5_plan_narrator = stub_narration
+    enhanced_pipeline.agent_5_plan_narrator = stub_narration
+    enhanced_pipeline.load_places_data = lambda: catalog
+
+    pipeline = enhanced_pipeline.EnhancedRAGPipeline(autoload=False)
+    if mode == "process":
+        executor.start_process_executor(pipeline, tempfile.mkdtemp(prefix="sanchar-bench-"), processes)
+    else:
+        pipeline.load_data()
+    pipeline.result_cache.max_entries = 0
+
+    rng = random.Random(seed)
+    profiles = [random_profile(pipeline, rng) for _ in range(requests)]
+
+    def one(profile):
+        t0 = time.perf_counter()
+        pipeline.generate_recommendations(profile)
+        return time.perf_counter() - t0
+
+    # Warm the workers (spawn + attach) before timing
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, profiles[:concurrency]))
+        started = time.perf_counter()
+        latencies = list(pool.map(one, profiles))
+        wall = time.perf_counter() - started
+
+    if pipeline.executor is not None:
+        pipeline.executor.shutdown()
+    ms = np.array(latencies) * 1000
+    return {
+        "mode": mode,
+        "size": size,
+        "requests": requests,
+        "concurrency": concurrency,
+        "processes": processes if mode == "process" else 0,
+        "throughput_rps": round(requests / wall, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3)
+    }
+
+def _child(queue, fn, args):
+    queue.put(fn(*args))
+
+def run_in_child(fn, *args) -> dict:
+    """Like run_isolated, but the child may start its own process pool"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_child, args=(queue, fn, args))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def print_executor_report(results: list):
+    header = f"{'executor':<28}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        label = f"{r['mode']}/{r['size']}/c{r['concurrency']}" + (f"/p{r['processes']}" if r["processes"] else "")
+        print(f"{label:<28}{r['throughput_rps']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}")
+
+# -------------------------
+# STARTUP
+# -------------------------
+STARTUP_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+main.enhanced_pipeline.load_data()
+t2 = time.perf_counter()
+print(json.dumps({
+    "import_seconds": t1 - t0,
+    "catalog_seconds": t2 - t1,
+    "genai_imported_eagerly": "google.generativeai" in sys.modules
+}))
+"""
+
+def measure_startup(runs: int) -> dict:
+    """Cold `import main` and catalog load, each run in a fresh interpreter"""
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", STARTUP_PROBE], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    def median(key):
+        values = sorted(s[key] for s in samples)
+        return round(values[len(values) // 2], 3)
+
+    return {
+        "runs": runs,
+        "import_seconds": median("import_seconds"),
+        "catalog_seconds": median("catalog_seconds"),
+        "genai_imported_eagerly": any(s["genai_imported_eagerly"] for s in samples)
+    }
+
+# -------------------------
+# REPORTING
+# -------------------------
+def scenario_key(result: dict) -> str:
+    return f"{result['target']}/{result['size']}/{'cache' if result['cache'] else 'nocache'}"
+
+def print_report(results: list, baseline: dict):
+    header = f"{'scenario':<32}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'req/s':>10}{'rss MB':>10}{'load s':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        o = r["overall"]
+        print(f"{scenario_key(r):<32}{o['p50_ms']:>10}{o['p90_ms']:>10}{o['p99_ms']:>10}"
+              f"{r['throughput_rps']:>10}{r['peak_rss_mb']:>10}{r['load_seconds']:>9}")
+        for kind, s in r["by_kind"].items():
+            print(f"  {kind:<30}{s['p50_ms']:>10}{s['p90_ms']:>10}{s['p99_ms']:>10}")
+
+        base = baseline.get(scenario_key(r))
+        if base:
+            def delta(new, old):
+                return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"  vs baseline: p50 {delta(o['p50_ms'], base['overall']['p50_ms'])}, "
+                  f"p99 {delta(o['p99_ms'], base['overall']['p99_ms'])}, "
+                  f"req/s {delta(r['throughput_rps'], base['throughput_rps'])}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--targets", nargs="+", choices=["enhanced", "legacy"], default=["enhanced", "legacy"])
+    parser.add_argument("--legacy-max-size", type=int, default=100_000,
+                        help="skip the legacy pipeline above this catalog size (it is row-by-row)")
+    parser.add_argument("--legacy-requests", type=int, default=20)
+    parser.add_argument("--no-cache", action="store_true", help="disable the result cache")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json output")
+    parser.add_argument("--compare-executors", action="store_true",
+                        help="compare thread vs process ranking under concurrent load instead of the workload replay")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--startup-runs", type=int, default=3, help="cold imports to measure (0 to skip)")
+    parser.add_argument("--startup-only", action="store_true", help="only measure startup")
+    parser.add_argument("--max-import-seconds", type=float,
+                        help="exit non-zero if `import main` is slower than this")
+    args = parser.parse_args()
+
+    startup = measure_startup(args.startup_runs) if args.startup_runs > 0 else None
+    if startup:
+        print(f"startup: import main {startup['import_seconds']}s, catalog load {startup['catalog_seconds']}s, "
+              f"genai imported eagerly: {startup['genai_imported_eagerly']}")
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {scenario_key(r): r for r in json.load(f)["results"]}
+
+    if args.compare_executors and not args.startup_only:
+        executor_results = []
+        for size in args.sizes:
+            for mode in ["thread", "process"]:
+                print(f"running {mode} executor with {size} places...", file=sys.stderr)
+                executor_results.append(run_in_child(run_executor_scenario, mode, size, args.requests,
+                                                     args.concurrency, args.processes, args.seed))
+        print_executor_report(executor_results)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"created": time.time(), "seed": args.seed, "startup": startup,
+                           "executors": executor_results}, f, indent=2)
+        return
+
+    results = []
+    for size in [] if args.startup_only else args.sizes:
+        for target in args.targets:
+            if target == "legacy" and size > args.legacy_max_size:
+                continue
+            requests = args.legacy_requests if target == "legacy" else args.requests
+            print(f"running {target} with {size} places ({requests} requests)...", file=sys.stderr)
+            results.append(run_isolated(target, size, requests, args.seed, not args.no_cache))
+
+    if results:
+        print_report(results, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"created": time.time(), "seed": args.seed, "startup": startup, "results": results}, f, indent=2)
+
+    if startup and args.max_import_seconds is not None and startup["import_seconds"] > args.max_import_seconds:
+        print(f"import main took {startup['import_seconds']}s (budget {args.max_import_seconds}s)", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
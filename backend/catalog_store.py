@@ -0,0 +1,347 @@
+"""
+Preprocessed catalog segment shared by all worker processes.
+
+The parent (or the first worker to start) writes the catalog arrays that
+EnhancedRAGPipeline ranks with into a directory of .npy files; every
+worker then attaches them with np.load(mmap_mode="r"). The pages live once
+in the OS page cache, so per-worker memory stays flat as workers and
+catalog size grow. Segments are written chunk by chunk (see ingest.py),
+so building one never needs the whole dataset in memory either.
+
+    python catalog_store.py build /var/lib/sanchar/catalog
+    python ingest.py bengaluru.csv mysuru.jsonl /var/lib/sanchar/catalog
+    SANCHAR_CATALOG_DIR=/var/lib/sanchar/catalog uvicorn main:app --workers 4
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, build before starting workers
+    fcntl = None
+
+CATALOG_DIR = os.getenv("SANCHAR_CATALOG_DIR", "")
+MANIFEST = "manifest.json"
+# Lock file in every version directory; attached workers hold a shared lock on it
+READERS = ".readers"
+FORMAT_VERSION = 4
+
+# Rows copied per step when a staged segment is compacted into place
+COPY_CHUNK_ROWS = 262_144
+
+# -----------------------------
+# STRING COLUMNS
+# -----------------------------
+
+def encode_strings(values) -> tuple:
+    """UTF-8 blob + (n + 1) offsets; None/NaN become empty strings"""
+    encoded = [("" if v is None or v != v else str(v)).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8) if encoded else np.empty(0, dtype=np.uint8)
+    return blob, offsets
+
+class MappedStrings:
+    """Read-only string column over a blob + offsets pair, indexed like a NumPy array"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _decode(self, i: int) -> str:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self._decode(int(index))
+        if isinstance(index, slice):
+            positions = range(*index.indices(len(self)))
+        else:
+            positions = np.asarray(index, dtype=np.int64).tolist()
+        out = np.empty(len(positions), dtype=object)
+        out[:] = [self._decode(i) for i in positions]
+        return out
+
+    def contains(self, needle: str) -> np.ndarray:
+        """Row mask of values containing needle, found by scanning the blob without decoding it"""
+        mask = np.zeros(len(self), dtype=bool)
+        if not needle:
+            mask[:] = True
+            return mask
+        encoded = needle.encode("utf-8")
+        pattern = re.compile(re.escape(encoded))
+        buffer = self.blob.data
+        position = 0
+        while True:
+            match = pattern.search(buffer, position)
+            if match is None:
+                return mask
+            start = match.start()
+            row = int(np.searchsorted(self.offsets, start, side="right")) - 1
+            end = int(self.offsets[row + 1])
+            if start + len(encoded) <= end:
+                mask[row] = True
+                position = end  # one hit per row is enough
+            else:
+                position = start + 1  # spans into the next value
+
+def id_hashes(place_ids) -> np.ndarray:
+    """64-bit digest per place_id; the key for dedup and the id index"""
+    return np.array([
+        int.from_bytes(hashlib.blake2b(str(place_id).encode("utf-8"), digest_size=8).digest(), "little")
+        for place_id in place_ids
+    ], dtype=np.uint64)
+
+class SortedIdIndex:
+    """place_id -> position lookups by binary search over sorted id hashes"""
+
+    def __init__(self, ids: MappedStrings, sorted_hashes: np.ndarray, order: np.ndarray):
+        self.ids = ids
+        self.sorted_hashes = sorted_hashes
+        self.order = order
+
+    def get_indexer(self, place_ids) -> np.ndarray:
+        found = np.full(len(place_ids), -1, dtype=np.int64)
+        hashes = id_hashes(place_ids)
+        starts = np.searchsorted(self.sorted_hashes, hashes, side="left")
+        stops = np.searchsorted(self.sorted_hashes, hashes, side="right")
+        for i, place_id in enumerate(place_ids):
+            # Confirm the string, in case two ids share a hash
+            for j in range(starts[i], stops[i]):
+                if self.ids[self.order[j]] == place_id:
+                    found[i] = self.order[j]
+                    break
+        return found
+
+# -----------------------------
+# BUILD / ATTACH
+# -----------------------------
+
+@contextmanager
+def build_lock(directory: str):
+    """Serialize builders across processes; the first one in writes the segment"""
+    os.makedirs(directory, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def read_manifest(directory: str):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == FORMAT_VERSION else None
+
+def _publish_manifest(directory: str, manifest: dict):
+    """Replace the manifest atomically, so attaching workers see either the
+    old segment or the complete new one"""
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+
+def pin_segment(directory: str, version: str):
+    """
+    Shared lock on a version's READERS file, held for as long as a worker
+    has the version attached; prune_segments leaves pinned versions alone.
+    Returns the open file to close when the worker moves on (None without fcntl).
+    """
+    if fcntl is None:
+        return None
+    pin = open(os.path.join(directory, version, READERS), "a")
+    fcntl.flock(pin, fcntl.LOCK_SH)
+    return pin
+
+def prune_segments(directory: str, current: str):
+    """Delete version directories other than current that no worker has pinned"""
+    if fcntl is None:
+        return
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name == current or name.startswith(".") or not os.path.isdir(path):
+            continue
+        try:
+            with open(os.path.join(path, READERS), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            continue  # still attached somewhere; a later build prunes it
+
+class SegmentWriter:
+    """
+    Builds one catalog version under directory/<version>/ from appended
+    column chunks. Chunks are staged as raw files; finish() copies the rows
+    to keep into .npy files a slice at a time, renames the finished
+    directory into place and publishes the manifest, so memory stays at one
+    chunk however large the input.
+
+    Published versions are immutable: workers map their files, and
+    truncating a mapped file kills them with SIGBUS. Versions are content
+    digests, so a rebuild of unchanged data reuses the existing directory.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.staging = tempfile.mkdtemp(dir=directory, prefix=".staging-")
+        self.rows = 0
+        self.dtypes = {}
+        self.string_names = []
+
+    def _staged_path(self, name: str) -> str:
+        return os.path.join(self.staging, name)
+
+    def append(self, numeric: Dict[str, np.ndarray], strings: Dict[str, list]):
+        """Stage one chunk; every chunk must carry the same columns"""
+        for name, array in numeric.items():
+            array = np.ascontiguousarray(array)
+            dtype = self.dtypes.setdefault(name, array.dtype)
+            with open(self._staged_path(name), "ab") as f:
+                f.write(array.astype(dtype, copy=False).tobytes())
+        for name, values in strings.items():
+            if name not in self.string_names:
+                self.string_names.append(name)
+            blob, offsets = encode_strings(values)
+            with open(self._staged_path(f"{name}.blob"), "ab") as f:
+                f.write(blob.tobytes())
+            with open(self._staged_path(f"{name}.lengths"), "ab") as f:
+                f.write(np.diff(offsets).tobytes())
+        self.rows += len(next(iter(numeric.values())))
+
+    def staged(self, name: str, dtype=None, start: int = 0, count: int = -1) -> np.ndarray:
+        """Rows [start, start + count) of a staged column (all rows by default)"""
+        dtype = np.dtype(dtype or self.dtypes[name])
+        path = self._staged_path(name)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=dtype)
+        return np.fromfile(path, dtype=dtype, count=count, offset=start * dtype.itemsize)
+
+    def _open_npy(self, path: str, dtype, length: int):
+        """.npy file opened for streaming `length` rows of dtype after the header"""
+        f = open(path, "wb")
+        np.lib.format.write_array_header_1_0(f, {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            "fortran_order": False,
+            "shape": (length,)
+        })
+        return f
+
+    def _copy_numeric(self, name: str, segment: str, keep: np.ndarray, size: int):
+        with self._open_npy(os.path.join(segment, f"{name}.npy"), self.dtypes[name], size) as out:
+            for start in range(0, self.rows, COPY_CHUNK_ROWS):
+                rows = self.staged(name, start=start, count=COPY_CHUNK_ROWS)
+                out.write(rows[keep[start:start + COPY_CHUNK_ROWS]].tobytes())
+
+    def _copy_strings(self, name: str, segment: str, keep: np.ndarray, size: int):
+        lengths_name, blob_name = f"{name}.lengths", f"{name}.blob"
+        total = 0
+        with self._open_npy(os.path.join(segment, f"{name}.offsets.npy"), np.int64, size + 1) as out:
+            out.write(np.zeros(1, dtype=np.int64).tobytes())
+            for start in range(0, self.rows, COPY_CHUNK_ROWS):
+                lengths = self.staged(lengths_name, np.int64, start, COPY_CHUNK_ROWS)
+                kept = lengths[keep[start:start + COPY_CHUNK_ROWS]]
+                out.write((total + np.cumsum(kept)).tobytes())
+                total += int(kept.sum())
+
+        byte_start = 0
+        with self._open_npy(os.path.join(segment, f"{name}.blob.npy"), np.uint8, total) as out:
+            for start in range(0, self.rows, COPY_CHUNK_ROWS):
+                lengths = self.staged(lengths_name, np.int64, start, COPY_CHUNK_ROWS)
+                chunk_bytes = int(lengths.sum())
+                blob = self.staged(blob_name, np.uint8, byte_start, chunk_bytes) if chunk_bytes else np.empty(0, np.uint8)
+                out.write(blob[np.repeat(keep[start:start + COPY_CHUNK_ROWS], lengths)].tobytes())
+                byte_start += chunk_bytes
+
+    def finish(self, version: str, sources: List[dict], keep: Optional[np.ndarray] = None,
+               extra_numeric: Optional[Dict[str, np.ndarray]] = None) -> dict:
+        """Write the kept rows (all by default) as segment `version` and point the manifest at it.
+
+        Callers hold build_lock, so no other builder publishes or prunes meanwhile.
+        """
+        if keep is None:
+            keep = np.ones(self.rows, dtype=bool)
+        size = int(keep.sum())
+        published = os.path.join(self.directory, version)
+        try:
+            if not os.path.isdir(published):
+                segment = os.path.join(self.staging, "segment")
+                os.makedirs(segment)
+                open(os.path.join(segment, READERS), "w").close()
+                for name in self.dtypes:
+                    self._copy_numeric(name, segment, keep, size)
+                for name in self.string_names:
+                    self._copy_strings(name, segment, keep, size)
+                for name, array in (extra_numeric or {}).items():
+                    np.save(os.path.join(segment, f"{name}.npy"), np.ascontiguousarray(array))
+                os.rename(segment, published)
+        finally:
+            shutil.rmtree(self.staging, ignore_errors=True)
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "size": size,
+            "sources": sources,
+            "numeric": sorted(set(self.dtypes) | set(extra_numeric or {})),
+            "strings": sorted(self.string_names)
+        }
+        _publish_manifest(self.directory, manifest)
+        prune_segments(self.directory, version)
+        return manifest
+
+    def abort(self):
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+def attach_segment(directory: str, manifest: dict) -> tuple:
+    """(numeric arrays, string columns) memory-mapped read-only"""
+    segment = os.path.join(directory, manifest["version"])
+    numeric = {
+        name: np.load(os.path.join(segment, f"{name}.npy"), mmap_mode="r")
+        for name in manifest["numeric"]
+    }
+    strings = {
+        name: MappedStrings(
+            np.load(os.path.join(segment, f"{name}.blob.npy"), mmap_mode="r"),
+            np.load(os.path.join(segment, f"{name}.offsets.npy"), mmap_mode="r")
+        )
+        for name in manifest["strings"]
+    }
+    return numeric, strings
+
+def source_stamp(path: str) -> dict:
+    """Identifies a source file a segment was built from (rebuild when it changes)"""
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "mtime": stat.st_mtime, "bytes": stat.st_size}
+
+def is_stale(manifest: dict) -> bool:
+    """True when a source file the segment was built from has changed since"""
+    for stamp in manifest.get("sources", []):
+        if os.path.exists(stamp["path"]) and source_stamp(stamp["path"]) != stamp:
+            return True
+    return False
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "build":
+        sys.exit("usage: python catalog_store.py build <directory>")
+    from enhanced_pipeline import EnhancedRAGPipeline
+    pipeline = EnhancedRAGPipeline(autoload=False)
+    pipeline.load_shared(sys.argv[2], rebuild=True)
+    print(f"catalog {pipeline.catalog_version}: {pipeline.size} places in {sys.argv[2]}")
@@ -1,13 +1,187 @@
 import pandas as pd
+import numpy as np
+import hashlib
 import json
+import os
+import re
+import time
 from typing import Dict, List, Optional
-from helpers import load_places_data, haversine
+from helpers import load_places_data, haversine_vector, geohash_encode, PLACES_CSV_PATH
+from scheduling import parse_slot
+from weather import WEATHER_BITS, suitability_bits
 from agents import agent_5_plan_narrator
+from cache import TTLCache
+from batcher import MicroBatcher, BATCH_WINDOW_MS, BATCH_MAX_REQUESTS
+import catalog_store
+from metrics import timed
+import outbound
+from logger import get_logger, fields
+
+log = get_logger("enhanced_pipeline")
+
+# Vibe keywords that earn a mood match (+0.4 each)
+MOOD_KEYWORDS = {
+    "chill": ["chill_relaxed", "general", "romantic"],
+    "fun": ["fun_lively", "general", "adventure"],
+    "romantic": ["romantic", "chill_relaxed", "general"],
+    "adventure": ["adventure", "fun_lively", "general"]
+}
+# Any other mood scores with this keyword alone
+DEFAULT_MOOD = "general"
+
+# Budget tiers in rupees (+0.3 when the place's range overlaps)
+BUDGET_TIERS = {
+    "low": (0, 300),
+    "medium": (200, 800),
+    "high": (500, 2000)
+}
+
+# Explicit rupee budgets: "200-500", "₹200 to ₹500", "under 300"
+RUPEE_RANGE_PATTERN = re.compile(r"^\s*(?:₹|rs\.?|inr)?\s*(\d+)\s*(?:-|–|to)\s*(?:₹|rs\.?|inr)?\s*(\d+)\s*$", re.IGNORECASE)
+RUPEE_MAX_PATTERN = re.compile(r"^\s*(?:under|below|upto|up to|max|<)\s*(?:₹|rs\.?|inr)?\s*(\d+)\s*$", re.IGNORECASE)
+
+def parse_rupee_range(budget) -> Optional[tuple]:
+    """(min, max) rupees for an explicit budget string, None for tiers / free text"""
+    if not isinstance(budget, str):
+        return None
+    match = RUPEE_RANGE_PATTERN.match(budget)
+    if match:
+        low, high = sorted((int(match.group(1)), int(match.group(2))))
+        return low, high
+    match = RUPEE_MAX_PATTERN.match(budget)
+    if match:
+        return 0, int(match.group(1))
+    return None
+
+def budget_bounds(budget) -> Optional[tuple]:
+    """Rupee bounds of a budget tier or explicit range"""
+    if budget in BUDGET_TIERS:
+        return BUDGET_TIERS[budget]
+    return parse_rupee_range(budget)
+
+# Bonus when a place's weather_suitability covers the current weather
+WEATHER_WEIGHT = 0.2
+
+# Per-place fields copied into every recommendation dict
+DISPLAY_COLUMNS = ["place_id", "place_name", "category", "famous_for", "area", "budget_range", "maps_url"]
+
+# Text columns kept after loading (display fields plus what scoring matches on)
+STRING_COLUMNS = DISPLAY_COLUMNS + ["vibe"]
+
+# Columns a preferred location is matched against, most specific first.
+# Lowercased copies are stored as "<col>_search" so lookups scan bytes, not objects.
+LOCATION_SEARCH_COLUMNS = ["area", "place_name", "category"]
+
+# Search radius tiers (km); sparse areas widen through these in one pass
+RADIUS_TIERS_KM = [2.0, 5.0, 10.0, 20.0, 50.0]
+
+# Upper bound on (profiles x places) cells scored at once by the batch path
+BATCH_MATRIX_CELLS = 4_000_000
+
+# Result cache: search points in the same geohash cell share ranked results
+RESULT_CACHE_GEOHASH_PRECISION = 7
+RESULT_CACHE_MAX_ENTRIES = 2048
+RESULT_CACHE_TTL_SECONDS = 600
+
+# Opening hours are minutes since local midnight in the catalog's city
+CATALOG_UTC_OFFSET_MIN = int(os.getenv("SANCHAR_CATALOG_UTC_OFFSET_MIN", "330"))
+MINUTES_PER_DAY = 1440
+# Plan length (hours) per time category, for "open now" windows
+PLAN_HOURS = {"1-2": 2, "2-4": 4, "half-day": 5, "full-day": 10}
+OPEN_MASK_CACHE_ENTRIES = 512
+# Score vectors for explicit rupee ranges; tier vectors are always kept
+BUDGET_RANGE_CACHE_ENTRIES = 32
+
+# -----------------------------
+# CATALOG COLUMNS
+# -----------------------------
+
+def frame_version(df: pd.DataFrame) -> str:
+    """Content hash of a catalog frame; changes whenever any loaded value does"""
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()[:12]
+
+def catalog_columns(df: pd.DataFrame) -> tuple:
+    """(numeric, strings) arrays that scoring and formatting read, from a loaded catalog frame.
+
+    Shared by EnhancedRAGPipeline._prepare_arrays and ingest.build_catalog,
+    so in-memory and segment catalogs derive identical columns.
+    """
+    numeric = {
+        "latitude": df["latitude"].to_numpy(dtype=float),
+        "longitude": df["longitude"].to_numpy(dtype=float),
+        "budget_min": pd.to_numeric(df["budget_min"], errors="coerce").to_numpy(dtype=float),
+        "budget_max": pd.to_numeric(df["budget_max"], errors="coerce").to_numpy(dtype=float),
+        "open_time": pd.to_numeric(df["open_time"], errors="coerce").to_numpy(dtype=float),
+        "close_time": pd.to_numeric(df["close_time"], errors="coerce").to_numpy(dtype=float),
+        "weather_bits": suitability_bits(df["weather_suitability"])
+    }
+    # Display strings are built once per catalog, not per recommendation
+    derived = {
+        "budget_range": "₹" + df["budget_min"].astype(str) + "-" + df["budget_max"].astype(str),
+        "maps_url": (
+            "https://www.google.com/maps/search/?api=1&query="
+            + df["place_name"].astype(str) + "+" + df["area"].astype(str)
+        ).str.replace(" ", "+", regex=False)
+    }
+    strings = {
+        col: (derived[col] if col in derived else df[col]).to_numpy(dtype=object)
+        for col in STRING_COLUMNS
+    }
+    return numeric, strings
+
+def mood_vector(vibes, mood: str) -> np.ndarray:
+    """Per-place mood score (+0.4 per matching vibe keyword)"""
+    vibes = pd.Series(vibes[:], dtype=object)
+    vector = np.zeros(len(vibes))
+    for keyword in MOOD_KEYWORDS.get(mood, [DEFAULT_MOOD]):
+        vector += 0.4 * vibes.str.contains(keyword, case=False, na=False).to_numpy(dtype=bool)
+    return vector
+
+def budget_vector(budget_min: np.ndarray, budget_max: np.ndarray, bounds: Optional[tuple]) -> np.ndarray:
+    """Per-place budget score (+0.3 when [budget_min, budget_max] overlaps bounds)"""
+    if bounds is None:
+        return np.zeros(len(budget_min))
+    return 0.3 * ((budget_max >= bounds[0]) & (budget_min <= bounds[1]))
+
+def search_values(values) -> np.ndarray:
+    """Lowercased values for case-insensitive location search (missing values stay missing)"""
+    return pd.Series(values, dtype=object).str.lower().to_numpy(dtype=object)
+
+def search_column(values) -> catalog_store.MappedStrings:
+    """In-memory equivalent of a segment's "<col>_search" column"""
+    return catalog_store.MappedStrings(*catalog_store.encode_strings(search_values(values)))
+
+def segment_columns(df: pd.DataFrame) -> tuple:
+    """(numeric, strings) columns a catalog segment stores for a loaded catalog frame"""
+    numeric, strings = catalog_columns(df)
+    # Per-mood / per-budget score vectors are shared too, not rebuilt per worker
+    for mood in [*MOOD_KEYWORDS, DEFAULT_MOOD]:
+        numeric[f"mood_{mood}"] = mood_vector(strings["vibe"], mood)
+    for budget, bounds in BUDGET_TIERS.items():
+        numeric[f"budget_{budget}"] = budget_vector(numeric["budget_min"], numeric["budget_max"], bounds)
+    for col in LOCATION_SEARCH_COLUMNS:
+        strings[f"{col}_search"] = search_values(df[col])
+    return numeric, strings
 
 class EnhancedRAGPipeline:
-    def __init__(self):
-        self.df = None
-        self.load_data()
+    def __init__(self, autoload: bool = True):
+        self.df = pd.DataFrame()
+        self.catalog_version = ""
+        self.ready = False
+        self.shared_dir = None
+        self.executor = None  # optional executor.ProcessRankingExecutor
+        self.segment_pin = None  # catalog_store.pin_segment() lock while a segment is attached
+        # Concurrent uncached rankings are computed together as one matrix
+        self.batcher = None
+        if BATCH_WINDOW_MS > 0:
+            self.batcher = MicroBatcher(self._rank_many, BATCH_WINDOW_MS / 1000, BATCH_MAX_REQUESTS)
+        self.result_cache = TTLCache(RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL_SECONDS)
+        self.open_masks = TTLCache(OPEN_MASK_CACHE_ENTRIES, RESULT_CACHE_TTL_SECONDS)
+        self.range_vectors = TTLCache(BUDGET_RANGE_CACHE_ENTRIES, RESULT_CACHE_TTL_SECONDS)
+        self._prepare_arrays()
+        # The app loads the catalog from its lifespan hook instead (see main.py)
+        if autoload:
+            self.load_data()
     
     def load_data(self):
         """Load and prepare the places dataset"""
@@ -16,11 +190,506 @@ class EnhancedRAGPipeline:
             self.df["latitude"] = pd.to_numeric(self.df["latitude"], errors="coerce")
             self.df["longitude"] = pd.to_numeric(self.df["longitude"], errors="coerce")
             self.df = self.df.dropna(subset=["latitude", "longitude"])
-            print(f"Loaded {len(self.df)} places successfully")
+            # place_id is the lookup key (id_index); the first row wins, as in ingest.build_catalog
+            duplicates = int(self.df["place_id"].duplicated().sum())
+            self.df = self.df.drop_duplicates(subset="place_id", keep="first").reset_index(drop=True)
+            log.info("catalog.loaded", extra=fields(places=len(self.df), duplicates=duplicates))
         except Exception as e:
-            print(f"Error loading data: {e}")
+            log.error("catalog.load_failed", extra=fields(error=str(e)))
             self.df = pd.DataFrame()
+        self._prepare_arrays()
+        self.ready = self.size > 0
+    
+    def _prepare_arrays(self):
+        """Cache NumPy copies of the columns used by bulk scoring"""
+        self._mood_vectors = {}
+        self._budget_vectors = {}
+        self._weather_vectors = {}
+        self.range_vectors.clear()
+        self.result_cache.clear()
+        self.size = len(self.df)
+        if self.size == 0:
+            self.catalog_version = ""
+            self.lat_arr = self.lon_arr = np.empty(0)
+            self.budget_min_arr = self.budget_max_arr = np.empty(0)
+            self.open_arr = self.close_arr = np.empty(0)
+            self.weather_bits = np.empty(0, dtype=np.uint8)
+            self.id_index = pd.Index([])
+            self.strings = {col: np.empty(0, dtype=object) for col in STRING_COLUMNS}
+            self.search_columns = {col: search_column([]) for col in LOCATION_SEARCH_COLUMNS}
+            self._prepare_hours()
+            self._prepare_budget_index()
+            return
+        self.catalog_version = frame_version(self.df)
+        numeric, self.strings = catalog_columns(self.df)
+        self.lat_arr = numeric["latitude"]
+        self.lon_arr = numeric["longitude"]
+        self.budget_min_arr = numeric["budget_min"]
+        self.budget_max_arr = numeric["budget_max"]
+        self.open_arr = numeric["open_time"]
+        self.close_arr = numeric["close_time"]
+        self.weather_bits = numeric["weather_bits"]
+        self.id_index = pd.Index(self.df["place_id"])
+        self.search_columns = {col: search_column(self.df[col]) for col in LOCATION_SEARCH_COLUMNS}
+        self._prepare_hours()
+        self._prepare_budget_index()
+    
+    # -----------------------------
+    # SHARED CATALOG SEGMENT
+    # -----------------------------
+
+    def load_shared(self, directory: str, rebuild: bool = False):
+        """Attach the catalog from a memory-mapped segment, building it first if needed.
+
+        Workers started together race for the build lock; the first one
+        builds the segment from the CSV and the rest attach to it, so the
+        arrays exist once in the page cache however many workers run.
+        """
+        from ingest import build_catalog
+        try:
+            # Attached under the lock too, so the version is pinned before any builder can prune it
+            with catalog_store.build_lock(directory):
+                manifest = catalog_store.read_manifest(directory)
+                if rebuild or manifest is None or catalog_store.is_stale(manifest):
+                    manifest = build_catalog([PLACES_CSV_PATH], directory)
+                self._attach_segment(directory, manifest)
+        except Exception as e:
+            log.error("catalog.shared_failed", extra=fields(directory=directory, error=repr(e)))
+            self.load_data()
+            return
+        log.info("catalog.attached", extra=fields(
+            places=self.size, version=self.catalog_version, directory=directory
+        ))
+    
+    def _attach_segment(self, directory: str, manifest: Dict):
+        pin = catalog_store.pin_segment(directory, manifest["version"])
+        numeric, strings = catalog_store.attach_segment(directory, manifest)
+        # Unpin the previous version; its files stay valid for arrays still in use
+        if self.segment_pin is not None:
+            self.segment_pin.close()
+        self.segment_pin = pin
+        self.df = None  # no per-worker DataFrame; everything reads the mapped arrays
+        self.result_cache.clear()
+        self.shared_dir = directory
+        self.size = manifest["size"]
+        self.catalog_version = manifest["version"] if self.size else ""
+        self.lat_arr = numeric["latitude"]
+        self.lon_arr = numeric["longitude"]
+        self.budget_min_arr = numeric["budget_min"]
+        self.budget_max_arr = numeric["budget_max"]
+        self.open_arr = numeric["open_time"]
+        self.close_arr = numeric["close_time"]
+        self.weather_bits = numeric["weather_bits"]
+        self.strings = strings
+        self.id_index = catalog_store.SortedIdIndex(
+            strings["place_id"], numeric["id_hash_sorted"], numeric["id_order"]
+        )
+        self._mood_vectors = {m: numeric[f"mood_{m}"] for m in [*MOOD_KEYWORDS, DEFAULT_MOOD]}
+        self.search_columns = {col: strings[f"{col}_search"] for col in LOCATION_SEARCH_COLUMNS}
+        self._budget_vectors = {BUDGET_TIERS[b]: numeric[f"budget_{b}"] for b in BUDGET_TIERS}
+        self._weather_vectors = {}
+        self.range_vectors.clear()
+        self._prepare_hours()
+        self._prepare_budget_index()
+        self.ready = self.size > 0
     
+    @timed("formatting")
+    def _format_recommendations(self, positions, scores, user_profile: Dict) -> List[Dict]:
+        """Recommendation dicts for catalog positions, in the given order.
+
+        Distances to the user's current location are one vectorized call and
+        every other field is a slice of the precomputed display columns.
+        """
+        positions = np.asarray(positions, dtype=int)
+        location = user_profile["location"]
+        current_lat = user_profile.get("current_location", {}).get("latitude", location["latitude"])
+        current_lon = user_profile.get("current_location", {}).get("longitude", location["longitude"])
+        
+        distances = np.round(haversine_vector(current_lat, current_lon,
+                                              self.lat_arr[positions], self.lon_arr[positions]), 2)
+        scores = np.round(np.asarray(scores, dtype=float), 3)
+        visit_time = user_profile["constraints"]["visit_time_per_place"]
+        
+        columns = [self.strings[col][positions].tolist() for col in DISPLAY_COLUMNS]
+        return [
+            {
+                "place_id": place_id,
+                "place_name": place_name,
+                "category": category,
+                "distance_km": distance,
+                "visit_time_hr": visit_time,
+                "preference_score": score,
+                "budget_range": budget_range,
+                "famous_for": famous_for,
+                "area": area,
+                "maps_url": maps_url
+            }
+            for place_id, place_name, category, famous_for, area, budget_range, maps_url, distance, score
+            in zip(*columns, distances.tolist(), scores.tolist())
+        ]
+    
+    # -----------------------------
+    # OPENING HOURS
+    # -----------------------------
+
+    def _prepare_hours(self):
+        """Opening-hours interval index: one [open, close) per place, close past midnight
+        already unwrapped, so availability masks are comparisons only.
+
+        Closing times at or before opening run past midnight; equal times
+        mean open all day. Unknown hours never match.
+        """
+        self.open_masks.clear()
+        open_t = np.asarray(self.open_arr, dtype=float)
+        close_t = np.asarray(self.close_arr, dtype=float)
+        self.hours = {
+            "open": open_t,
+            "close": np.where(close_t < open_t, close_t + MINUTES_PER_DAY, close_t),
+            "all_day": open_t == close_t
+        }
+
+    def open_for_mask(self, start_min: float, end_min: float, min_minutes: float) -> np.ndarray:
+        """Catalog mask of places open for at least min_minutes within [start, end).
+
+        Windows are minutes since midnight and may extend past midnight.
+        Masks are cached per window, so repeated "open now" checks within
+        the same minute reuse one array.
+        """
+        key = (start_min, end_min, min_minutes)
+        mask = self.open_masks.get(key)
+        if mask is not None:
+            return mask
+
+        open_t, close_t = self.hours["open"], self.hours["close"]
+        # The opening interval as of yesterday, today and tomorrow
+        overlap = np.full(self.size, -np.inf)
+        for shift in (-MINUTES_PER_DAY, 0, MINUTES_PER_DAY):
+            overlap = np.maximum(overlap, np.minimum(close_t + shift, end_min) - np.maximum(open_t + shift, start_min))
+        mask = (overlap >= min_minutes) | self.hours["all_day"]
+        self.open_masks.set(key, mask)
+        return mask
+
+    def open_during_mask(self, start_min: float, end_min: float, positions=None) -> np.ndarray:
+        """Places open for the whole [start, end) window (minutes since midnight)"""
+        mask = self.open_for_mask(start_min, end_min, end_min - start_min)
+        return mask if positions is None else mask[positions]
+
+    def closed_mask(self, user_profile: Dict) -> Optional[np.ndarray]:
+        """Places closed during the profile's open_window constraint (None when it has none).
+
+        open_window is [start, end] minutes since midnight; a place qualifies
+        if it is open for one visit (visit_time_per_place) inside it.
+        """
+        window = user_profile.get("constraints", {}).get("open_window")
+        if not window or self.size == 0:
+            return None
+        start_min, end_min = window
+        visit_minutes = user_profile["constraints"].get("visit_time_per_place", 1.0) * 60
+        return ~self.open_for_mask(start_min, end_min, min(visit_minutes, end_min - start_min))
+
+    # -----------------------------
+    # BUDGET INDEX
+    # -----------------------------
+
+    def _prepare_budget_index(self):
+        """Places ordered by cost (budget_max, then budget_min), plus each place's cost rank.
+
+        Overlap queries binary-search the sorted budget_max; "cheapest"
+        sorts a candidate set by integer rank instead of re-reading budgets.
+        """
+        budget_min = np.asarray(self.budget_min_arr, dtype=float)
+        budget_max = np.asarray(self.budget_max_arr, dtype=float)
+        order = np.lexsort((budget_min, budget_max))  # unknown budgets sort last
+        self.budget_order = order
+        self.sorted_budget_max = budget_max[order]
+        # Dense rank: places with the same budget share one, so ties keep distance order
+        sorted_min = budget_min[order]
+        changed = np.r_[True, (self.sorted_budget_max[1:] != self.sorted_budget_max[:-1])
+                        | (sorted_min[1:] != sorted_min[:-1])] if self.size else np.empty(0, dtype=bool)
+        self.cost_rank = np.empty(self.size, dtype=np.int64)
+        self.cost_rank[order] = np.cumsum(changed) - 1
+
+    def budget_mask(self, min_cost: float, max_cost: float) -> np.ndarray:
+        """Catalog mask of places whose [budget_min, budget_max] overlaps [min_cost, max_cost]"""
+        mask = np.zeros(self.size, dtype=bool)
+        start = int(np.searchsorted(self.sorted_budget_max, min_cost, side="left"))
+        stop = int(np.searchsorted(self.sorted_budget_max, np.inf, side="right"))
+        candidates = self.budget_order[start:stop]
+        mask[candidates[self.budget_min_arr[candidates] <= max_cost]] = True
+        return mask
+
+    def over_budget_mask(self, user_profile: Dict) -> Optional[np.ndarray]:
+        """Places outside an explicit rupee budget (None for tiers, which only score)"""
+        bounds = parse_rupee_range(user_profile["preferences"].get("budget"))
+        if bounds is None or self.size == 0:
+            return None
+        return ~self.budget_mask(*bounds)
+
+    def cheapest_nearby(self, lat: float, lon: float, radius_km: float,
+                        min_cost: float = 0, max_cost: float = np.inf, limit: int = 10) -> List[Dict]:
+        """Places within radius_km in the cost range, cheapest first (nearest among equal cost)"""
+        if self.size == 0:
+            return []
+        positions, distances, _ = self.search_nearby(
+            lat, lon, radius_km, exclude_mask=~self.budget_mask(min_cost, max_cost)
+        )
+        order = np.argsort(self.cost_rank[positions], kind="stable")[:limit]
+        positions, distances = positions[order], np.round(distances[order], 2)
+        columns = [self.strings[col][positions].tolist()
+                   for col in ("place_id", "place_name", "category", "area", "budget_range", "maps_url")]
+        return [
+            {
+                "place_id": place_id,
+                "place_name": place_name,
+                "category": category,
+                "area": area,
+                "budget_min": budget_min,
+                "budget_max": budget_max,
+                "budget_range": budget_range,
+                "distance_km": distance,
+                "maps_url": maps_url
+            }
+            for place_id, place_name, category, area, budget_range, maps_url, budget_min, budget_max, distance
+            in zip(*columns, self.budget_min_arr[positions].tolist(),
+                   self.budget_max_arr[positions].tolist(), distances.tolist())
+        ]
+
+    def open_window(self, time_category: str, visit_window: Optional[str] = None,
+                    open_now: bool = False) -> Optional[List[int]]:
+        """[start, end] minutes for an explicit "6-8pm" window, or from now for the plan's length"""
+        if visit_window:
+            parsed = parse_slot(visit_window)
+            if parsed:
+                return list(parsed)
+        if open_now:
+            local_minutes = int((time.time() // 60 + CATALOG_UTC_OFFSET_MIN) % MINUTES_PER_DAY)
+            return [local_minutes, local_minutes + int(PLAN_HOURS.get(time_category, 2) * 60)]
+        return None
+    
+    def places_open_during(self, place_ids: List[str], start_min: float, end_min: float) -> List[str]:
+        """Subset of place_ids (in order) open for the whole window"""
+        positions = self.id_index.get_indexer(place_ids)
+        known = positions >= 0
+        open_mask = np.zeros(len(place_ids), dtype=bool)
+        open_mask[known] = self.open_during_mask(start_min, end_min, positions[known])
+        return [pid for pid, is_open in zip(place_ids, open_mask) if is_open]
+    
+    def _result_cache_key(self, user_profile: Dict, exclude_mask: Optional[np.ndarray] = None) -> tuple:
+        """Cache key from the quantized search point and the ranking inputs"""
+        location = user_profile["location"]
+        preferences = user_profile["preferences"]
+        return (
+            geohash_encode(location["latitude"], location["longitude"], RESULT_CACHE_GEOHASH_PRECISION),
+            round(float(location["search_radius_km"]), 3),
+            preferences["mood"],
+            preferences["budget"],
+            preferences.get("weather"),
+            preferences["time_available"],
+            user_profile["constraints"]["max_places"],
+            self.catalog_version,
+            self._mask_key(exclude_mask)
+        )
+    
+    def _mood_vector(self, mood: str) -> np.ndarray:
+        """Per-place mood score (see mood_vector), cached per mood"""
+        # Unknown moods all score as DEFAULT_MOOD, so they share one vector
+        mood = mood if mood in MOOD_KEYWORDS else DEFAULT_MOOD
+        if mood not in self._mood_vectors:
+            self._mood_vectors[mood] = mood_vector(self.strings["vibe"], mood)
+        return self._mood_vectors[mood]
+    
+    def _budget_vector(self, budget: str) -> np.ndarray:
+        """Per-place budget score (see budget_vector), cached per rupee range"""
+        bounds = budget_bounds(budget)
+        if bounds in self._budget_vectors:
+            return self._budget_vectors[bounds]
+        if bounds is not None and bounds not in BUDGET_TIERS.values():
+            # Explicit ranges are client-chosen, so only a bounded LRU of them is kept
+            vector = self.range_vectors.get(bounds)
+            if vector is None:
+                vector = budget_vector(self.budget_min_arr, self.budget_max_arr, bounds)
+                self.range_vectors.set(bounds, vector)
+            return vector
+        vector = budget_vector(self.budget_min_arr, self.budget_max_arr, bounds)
+        self._budget_vectors[bounds] = vector
+        return vector
+
+    def _weather_vector(self, weather: Optional[str]) -> np.ndarray:
+        """Per-place weather score: one AND of the suitability bitmask with the condition's bit"""
+        weather = weather if weather in WEATHER_BITS else None
+        if weather not in self._weather_vectors:
+            vector = np.zeros(self.size)
+            if weather in WEATHER_BITS:
+                vector += WEATHER_WEIGHT * ((self.weather_bits & WEATHER_BITS[weather]) != 0)
+            self._weather_vectors[weather] = vector
+        return self._weather_vectors[weather]
+
+    def _base_scores(self, positions: np.ndarray, preferences: Dict) -> np.ndarray:
+        """Mood + budget + weather score for catalog positions (distance is added when ranking)"""
+        return (self._mood_vector(preferences["mood"])[positions]
+                + self._budget_vector(preferences["budget"])[positions]
+                + self._weather_vector(preferences.get("weather"))[positions])
+
+    def session_candidates(self, user_profile: Dict, session: Optional[Dict] = None) -> Dict:
+        """Places inside the search radius with distances and base scores.
+
+        Kept in the session and reused by follow-up turns until the search
+        point, radius, preferences or catalog version change, so a turn only
+        re-filters and re-ranks this small array. Base scores are mood +
+        budget; the distance part depends on the filtered subset and is
+        added at ranking time.
+        """
+        location = user_profile["location"]
+        preferences = user_profile["preferences"]
+        key = (
+            float(location["latitude"]),
+            float(location["longitude"]),
+            float(location["search_radius_km"]),
+            preferences["mood"],
+            preferences["budget"],
+            preferences.get("weather"),
+            self.catalog_version
+        )
+        cached = session.get("candidates") if session is not None else None
+        if cached is not None and cached["key"] == key:
+            return cached
+
+        positions, distances, _ = self.search_nearby(key[0], key[1], key[2])
+        candidates = {
+            "key": key,
+            "positions": positions,
+            "distances": distances,
+            "base_scores": self._base_scores(positions, preferences)
+        }
+        if session is not None:
+            session["candidates"] = candidates
+        return candidates
+
+    @timed("scoring")
+    def _rank_candidates(self, candidates: Dict, keep: np.ndarray, max_places: int) -> tuple:
+        """Top kept candidates as (positions, scores): mood + budget + weather + 0.3 x closeness"""
+        positions = candidates["positions"][keep]
+        distances = candidates["distances"][keep]
+        scores = candidates["base_scores"][keep]
+        if positions.size == 0:
+            return positions, scores
+
+        max_distance = distances.max()
+        if max_distance > 0:
+            scores = scores + 0.3 * (1 - distances / max_distance)
+        # Candidates are nearest first, so a stable sort breaks ties by distance
+        order = np.argsort(-scores, kind="stable")[:max_places]
+        return positions[order], scores[order]
+
+    def _category_mask(self, positions: np.ndarray, category: str) -> np.ndarray:
+        """Case-insensitive partial category match for catalog positions"""
+        categories = pd.Series(self.strings["category"][positions], dtype=object)
+        return categories.str.lower().str.contains(category.lower(), regex=False, na=False).to_numpy(dtype=bool)
+
+    def _session_exclusions(self, session: Dict) -> Dict:
+        """Packed bitsets over catalog positions for what a session ruled out.
+
+        "excluded" covers excluded categories and visited places and applies
+        to every ranking; "seen" covers everything already shown and is only
+        applied by regenerate. The category names and visited IDs are kept
+        too, so the bits can be rebuilt when the catalog changes.
+        """
+        exclusions = session.get("exclusions")
+        if exclusions is not None and exclusions["catalog_version"] == self.catalog_version:
+            return exclusions
+
+        categories = exclusions["categories"] if exclusions else []
+        visited_ids = exclusions["visited_ids"] if exclusions else []
+        exclusions = {
+            "catalog_version": self.catalog_version,
+            "categories": categories,
+            "visited_ids": visited_ids,
+            "excluded": self._excluded_bits(categories, visited_ids),
+            "seen": np.packbits(np.zeros(self.size, dtype=bool))
+        }
+        session["exclusions"] = exclusions
+        return exclusions
+
+    def _excluded_bits(self, categories: List[str], visited_ids: List[str]) -> np.ndarray:
+        excluded = np.zeros(self.size, dtype=bool)
+        all_positions = np.arange(self.size)
+        for category in categories:
+            excluded |= self._category_mask(all_positions, category)
+        visited = self.id_index.get_indexer(visited_ids)
+        excluded[visited[visited >= 0]] = True
+        return np.packbits(excluded)
+
+    def _update_exclusion_bits(self, session: Optional[Dict], name: str, positions) -> None:
+        """Set the given catalog positions in one of the session's bitsets"""
+        if session is None:
+            return
+        exclusions = self._session_exclusions(session)
+        bits = np.unpackbits(exclusions[name], count=self.size).astype(bool)
+        bits[np.asarray(positions, dtype=int)] = True
+        exclusions[name] = np.packbits(bits)
+
+    def exclude_category_for_session(self, session: Optional[Dict], category: str) -> None:
+        if session is None:
+            return
+        exclusions = self._session_exclusions(session)
+        if category.lower() not in exclusions["categories"]:
+            exclusions["categories"].append(category.lower())
+        self._update_exclusion_bits(session, "excluded", np.flatnonzero(
+            self._category_mask(np.arange(self.size), category)
+        ))
+
+    def include_category_for_session(self, session: Optional[Dict], category: str) -> None:
+        """Asking for a category explicitly lifts an earlier exclusion of it"""
+        if session is None or "exclusions" not in session:
+            return
+        exclusions = self._session_exclusions(session)
+        if category.lower() in exclusions["categories"]:
+            exclusions["categories"].remove(category.lower())
+            exclusions["excluded"] = self._excluded_bits(exclusions["categories"], exclusions["visited_ids"])
+
+    def mark_visited(self, session: Optional[Dict], place_id: str) -> None:
+        if session is None:
+            return
+        exclusions = self._session_exclusions(session)
+        if place_id not in exclusions["visited_ids"]:
+            exclusions["visited_ids"].append(place_id)
+        positions = self.id_index.get_indexer([place_id])
+        self._update_exclusion_bits(session, "excluded", positions[positions >= 0])
+
+    def mark_seen(self, session: Optional[Dict], recommendations: List[Dict]) -> None:
+        if session is None or not recommendations:
+            return
+        positions = self.id_index.get_indexer([r["place_id"] for r in recommendations])
+        self._update_exclusion_bits(session, "seen", positions[positions >= 0])
+
+    def ruled_out_mask(self, user_profile: Dict, session: Optional[Dict],
+                       include_seen: bool = False) -> Optional[np.ndarray]:
+        """Session exclusions plus places closed during the profile's open window
+        or outside an explicit rupee budget"""
+        excluded = self.exclusion_mask(session, include_seen)
+        for mask in (self.closed_mask(user_profile), self.over_budget_mask(user_profile)):
+            if mask is not None:
+                excluded = mask if excluded is None else excluded | mask
+        return excluded
+
+    def exclusion_mask(self, session: Optional[Dict], include_seen: bool = False) -> Optional[np.ndarray]:
+        """One boolean mask over the catalog of places this session ruled out (None if nothing)"""
+        if session is None or "exclusions" not in session:
+            return None
+        exclusions = self._session_exclusions(session)
+        bits = exclusions["excluded"]
+        if include_seen:
+            bits = bits | exclusions["seen"]
+        if not bits.any():
+            return None
+        return np.unpackbits(bits, count=self.size).astype(bool)
+
+    def _mask_key(self, mask: Optional[np.ndarray]) -> Optional[str]:
+        """Short digest of an exclusion mask for result cache keys"""
+        if mask is None:
+            return None
+        return hashlib.blake2b(np.packbits(mask).tobytes(), digest_size=8).hexdigest()
+
     def extract_location_coordinates(self, preferred_location: str) -> tuple:
         """Extract coordinates from preferred location by matching with dataset"""
         if not preferred_location or preferred_location.lower() in ["current_location", ""]:
@@ -29,34 +698,30 @@ class EnhancedRAGPipeline:
         # Clean and normalize the location name
         location_lower = preferred_location.lower().strip()
         
-        # Search in area column first (most specific)
-        area_matches = self.df[self.df["area"].str.lower().str.contains(location_lower, na=False)]
-        if not area_matches.empty:
-            # Get the centroid of all matching places
-            avg_lat = area_matches["latitude"].mean()
-            avg_lon = area_matches["longitude"].mean()
-            return avg_lat, avg_lon
-        
-        # Search in place names
-        name_matches = self.df[self.df["place_name"].str.lower().str.contains(location_lower, na=False)]
-        if not name_matches.empty:
-            avg_lat = name_matches["latitude"].mean()
-            avg_lon = name_matches["longitude"].mean()
-            return avg_lat, avg_lon
-        
-        # Search in category for broader matches
-        category_matches = self.df[self.df["category"].str.lower().str.contains(location_lower, na=False)]
-        if not category_matches.empty:
-            avg_lat = category_matches["latitude"].mean()
-            avg_lon = category_matches["longitude"].mean()
-            return avg_lat, avg_lon
+        if not location_lower:
+            return None, None
+
+        # Search in area column first (most specific), then place names,
+        # then category for broader matches
+        for column in LOCATION_SEARCH_COLUMNS:
+            matches = self.search_columns[column].contains(location_lower)
+            if matches.any():
+                # Get the centroid of all matching places
+                return float(self.lat_arr[matches].mean()), float(self.lon_arr[matches].mean())
         
         return None, None
     
     def create_user_profile_json(self, mood: str, budget: str, time: str, 
                                 lat: float, lon: float, preferred_location: str = "", 
-                                use_current_location: bool = False) -> Dict:
-        """Create structured JSON from user inputs"""
+                                use_current_location: bool = False,
+                                open_window: Optional[List[int]] = None,
+                                weather: Optional[str] = None) -> Dict:
+        """Create structured JSON from user inputs.
+
+        open_window ([start, end] minutes since midnight, see open_window())
+        limits recommendations to places open for a visit inside it; weather
+        (a weather.WEATHER_CONDITIONS key) favors places suited to it.
+        """
         # Store user's actual current location
         current_lat, current_lon = lat, lon
         
@@ -65,7 +730,8 @@ class EnhancedRAGPipeline:
         initial_radius = 2.0 if use_current_location else 5.0  # 2km for Nearby, 5km for location search (will expand if needed)
         
         if not use_current_location and preferred_location and preferred_location.lower() not in ["current_location", ""]:
-            extracted_lat, extracted_lon = self.extract_location_coordinates(preferred_location)
+            with timed("location_resolution"):
+                extracted_lat, extracted_lon = self.extract_location_coordinates(preferred_location)
             if extracted_lat is not None and extracted_lon is not None:
                 search_lat, search_lon = extracted_lat, extracted_lon
         
@@ -74,7 +740,8 @@ class EnhancedRAGPipeline:
                 "mood": mood,
                 "budget": budget,
                 "time_available": time,
-                "preferred_location": preferred_location or "current_location"
+                "preferred_location": preferred_location or "current_location",
+                "weather": weather
             },
             "location": {
                 "latitude": search_lat,
@@ -90,6 +757,8 @@ class EnhancedRAGPipeline:
                 "visit_time_per_place": self._get_time_per_place(time)
             }
         }
+        if open_window:
+            user_profile["constraints"]["open_window"] = list(open_window)
         return user_profile
     
     def _get_time_per_place(self, time_category: str) -> float:
@@ -102,105 +771,60 @@ class EnhancedRAGPipeline:
         }
         return time_mapping.get(time_category, 1.0)
     
-    def filter_places_by_distance(self, user_lat: float, user_lon: float, 
-                                 radius_km: float = 2.0) -> pd.DataFrame:
-        """Filter places within specified radius"""
-        if self.df.empty:
-            return pd.DataFrame()
-        
-        # Calculate distances
-        self.df["distance_km"] = self.df.apply(
-            lambda row: haversine(user_lat, user_lon, row["latitude"], row["longitude"]),
-            axis=1
-        )
-        
-        # Filter by distance
-        nearby_places = self.df[self.df["distance_km"] <= radius_km].copy()
-        return nearby_places.sort_values("distance_km")
-    
-    def score_places_by_preferences(self, places_df: pd.DataFrame, 
-                                   user_profile: Dict) -> pd.DataFrame:
-        """Score places based on user preferences"""
-        if places_df.empty:
-            return places_df
-        
-        mood = user_profile["preferences"]["mood"]
-        budget = user_profile["preferences"]["budget"]
-        
-        # Initialize scores
-        places_df["preference_score"] = 0.0
-        
-        # Mood scoring
-        mood_mapping = {
-            "chill": ["chill_relaxed", "general", "romantic"],
-            "fun": ["fun_lively", "general", "adventure"],
-            "romantic": ["romantic", "chill_relaxed", "general"],
-            "adventure": ["adventure", "fun_lively", "general"]
-        }
-        
-        mood_keywords = mood_mapping.get(mood, ["general"])
-        for keyword in mood_keywords:
-            mask = places_df["vibe"].str.contains(keyword, case=False, na=False)
-            places_df.loc[mask, "preference_score"] += 0.4
-        
-        # Budget scoring
-        budget_mapping = {
-            "low": (0, 300),
-            "medium": (200, 800),
-            "high": (500, 2000)
-        }
-        
-        if budget in budget_mapping:
-            min_budget, max_budget = budget_mapping[budget]
-            budget_mask = (
-                (places_df["budget_min"] <= max_budget) & 
-                (places_df["budget_max"] >= min_budget)
-            )
-            places_df.loc[budget_mask, "preference_score"] += 0.3
-        
-        # Distance scoring (closer is better)
-        max_distance = places_df["distance_km"].max()
-        if max_distance > 0:
-            places_df["distance_score"] = 1 - (places_df["distance_km"] / max_distance)
-            places_df["preference_score"] += places_df["distance_score"] * 0.3
-        
-        return places_df.sort_values("preference_score", ascending=False)
+    @timed("distance_filter")
+    def search_nearby(self, user_lat: float, user_lon: float, radius_km: float,
+                      min_results: int = 0, exclude_mask: Optional[np.ndarray] = None) -> tuple:
+        """Single-pass nearest search that widens through RADIUS_TIERS_KM.
+
+        Distances are computed once and the candidates inside the widest
+        tier are sorted; each tier is then a searchsorted on that order.
+        Stops at the first tier with at least min_results places and returns
+        (catalog positions, distances, radius used), nearest first.
+        """
+        if self.size == 0:
+            return np.empty(0, dtype=int), np.empty(0), radius_km
+        
+        tiers = [radius_km]
+        if min_results > 0:
+            tiers += [t for t in RADIUS_TIERS_KM if t > radius_km]
+        
+        distances = haversine_vector(user_lat, user_lon, self.lat_arr, self.lon_arr)
+        keep = distances <= tiers[-1]
+        if exclude_mask is not None:
+            keep &= ~exclude_mask
+        positions = np.flatnonzero(keep)
+        positions = positions[np.argsort(distances[positions], kind="stable")]
+        distances = distances[positions]
+        
+        for radius in tiers:
+            count = int(np.searchsorted(distances, radius, side="right"))
+            if count >= min_results:
+                break
+        return positions[:count], distances[:count], radius
     
-    def expand_search_radius(self, user_profile: Dict, current_results: int) -> Dict:
-        """Expand search radius if insufficient results"""
-        current_radius = user_profile["location"]["search_radius_km"]
-        
-        if current_results < 3:
-            if current_radius < 10:
-                user_profile["location"]["search_radius_km"] = 10.0
-            elif current_radius < 20:
-                user_profile["location"]["search_radius_km"] = 20.0
-            elif current_radius < 50:
-                user_profile["location"]["search_radius_km"] = 50.0
-        
-        return user_profile
+    def _next_radius_tier(self, radius_km: float) -> float:
+        """Smallest tier above the current radius (capped at the widest)"""
+        for tier in RADIUS_TIERS_KM:
+            if tier > radius_km:
+                return tier
+        return RADIUS_TIERS_KM[-1]
     
-    def generate_recommendations(self, user_profile: Dict) -> Dict:
+    def generate_recommendations(self, user_profile: Dict, session: Optional[Dict] = None) -> Dict:
         """Main RAG function to generate place recommendations"""
-        user_lat = user_profile["location"]["latitude"]
-        user_lon = user_profile["location"]["longitude"]
-        radius = user_profile["location"]["search_radius_km"]
-        max_places = user_profile["constraints"]["max_places"]
-        
-        # Get user's actual current location for distance calculation
-        current_lat = user_profile.get("current_location", {}).get("latitude", user_lat)
-        current_lon = user_profile.get("current_location", {}).get("longitude", user_lon)
-        
-        # Filter places by distance from search location
-        nearby_places = self.filter_places_by_distance(user_lat, user_lon, radius)
+        # Places the session ruled out (or closed in the plan's window) stay out, even when the radius widens
+        exclude_mask = self.ruled_out_mask(user_profile, session)
+
+        # Repeated queries from the same neighborhood skip distance + scoring
+        cache_key = self._result_cache_key(user_profile, exclude_mask)
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            cached = self._rank(user_profile, exclude_mask)
+            self.result_cache.set(cache_key, cached)
         
-        # If insufficient results, expand radius
-        if len(nearby_places) < 3:
-            user_profile = self.expand_search_radius(user_profile, len(nearby_places))
-            radius = user_profile["location"]["search_radius_km"]
-            nearby_places = self.filter_places_by_distance(user_lat, user_lon, radius)
+        radius = cached["radius"]
+        user_profile["location"]["search_radius_km"] = radius
         
-        if nearby_places.empty:
+        if cached["total"] == 0:
             return {
                 "user_profile": user_profile,
                 "recommendations": [],
@@ -209,30 +833,9 @@ class EnhancedRAGPipeline:
                 "total_places_found": 0
             }
         
-        # Score places by preferences
-        scored_places = self.score_places_by_preferences(nearby_places, user_profile)
-        
-        # Select top recommendations
-        top_places = scored_places.head(max_places)
-        
         # Format recommendations with distance from current location
-        recommendations = []
-        for _, place in top_places.iterrows():
-            # Calculate distance from user's current location
-            actual_distance = haversine(current_lat, current_lon, place["latitude"], place["longitude"])
-            
-            recommendations.append({
-                "place_id": place["place_id"],
-                "place_name": place["place_name"],
-                "category": place["category"],
-                "distance_km": round(actual_distance, 2),
-                "visit_time_hr": user_profile["constraints"]["visit_time_per_place"],
-                "preference_score": round(place["preference_score"], 3),
-                "budget_range": f"₹{place['budget_min']}-{place['budget_max']}",
-                "famous_for": place["famous_for"],
-                "area": place["area"],
-                "maps_url": f"https://www.google.com/maps/search/?api=1&query={place["place_name"]}+{place["area"]}".replace(" ", "+")
-            })
+        recommendations = self._format_recommendations(cached["positions"], cached["scores"], user_profile)
+        self.mark_seen(session, recommendations)
         
         # Generate narration
         narration = self._generate_contextual_narration(user_profile, recommendations)
@@ -242,9 +845,210 @@ class EnhancedRAGPipeline:
             "recommendations": recommendations,
             "narration": narration,
             "search_radius_used": radius,
-            "total_places_found": len(nearby_places)
+            "total_places_found": cached["total"]
         }
-    
+
+    def _rank(self, user_profile: Dict, exclude_mask: Optional[np.ndarray] = None,
+              min_results: int = 3) -> Dict:
+        """_rank_nearby, micro-batched with concurrent requests when a batcher is set"""
+        request = (user_profile, exclude_mask, min_results)
+        if self.batcher is not None:
+            return self.batcher.submit(request)
+        return self._rank_many([request])[0]
+
+    def _rank_many(self, requests: List[tuple]) -> List[Dict]:
+        """Rank (user_profile, exclude_mask, min_results) requests, in worker processes if attached"""
+        if self.executor is not None:
+            try:
+                return self.executor.rank_many(requests)
+            except Exception as e:
+                log.warning("executor.rank_failed", extra=fields(error=repr(e)))
+        return self._rank_nearby_batch(requests)
+
+    @timed("batch_ranking")
+    def _rank_nearby_batch(self, requests: List[tuple]) -> List[Dict]:
+        """_rank_nearby for many requests, sharing (requests x places) matrix operations"""
+        if len(requests) == 1 or self.size == 0:
+            return [self._rank_nearby(*request) for request in requests]
+
+        chunk_size = max(1, BATCH_MATRIX_CELLS // self.size)
+        results = []
+        for start in range(0, len(requests), chunk_size):
+            results.extend(self._rank_request_chunk(requests[start:start + chunk_size]))
+        return results
+
+    def _rank_request_chunk(self, requests: List[tuple]) -> List[Dict]:
+        """One chunk of _rank_nearby_batch; same widening, scores and tie order as _rank_nearby"""
+        profiles = [request[0] for request in requests]
+        search_lat = np.array([p["location"]["latitude"] for p in profiles], dtype=float)
+        search_lon = np.array([p["location"]["longitude"] for p in profiles], dtype=float)
+        radius = np.array([p["location"]["search_radius_km"] for p in profiles], dtype=float)
+        min_results = np.array([request[2] for request in requests])
+
+        distances = haversine_vector(search_lat[:, None], search_lon[:, None],
+                                     self.lat_arr[None, :], self.lon_arr[None, :])
+        allowed = np.ones(distances.shape, dtype=bool)
+        for i, (_, exclude_mask, _) in enumerate(requests):
+            if exclude_mask is not None:
+                allowed[i] = ~exclude_mask
+        within = (distances <= radius[:, None]) & allowed
+        counts = within.sum(axis=1)
+
+        # Widen through the radius tiers until each request has min_results places
+        for tier in RADIUS_TIERS_KM:
+            expand = np.flatnonzero((counts < min_results) & (radius < tier))
+            if expand.size == 0:
+                continue
+            radius[expand] = tier
+            within[expand] = (distances[expand] <= tier) & allowed[expand]
+            counts[expand] = within[expand].sum(axis=1)
+
+        max_distance = np.where(within, distances, 0.0).max(axis=1)
+        results = []
+        for i, profile in enumerate(profiles):
+            kept = np.flatnonzero(within[i])
+            scores = self._base_scores(kept, profile["preferences"])
+            if max_distance[i] > 0:
+                scores = scores + 0.3 * (1 - distances[i, kept] / max_distance[i])
+
+            k = min(profile["constraints"]["max_places"], kept.size)
+            if k > 0:
+                # Keep every place tied with the k-th score so ties resolve like a full sort
+                cutoff = -np.partition(-scores, k - 1)[k - 1]
+                top = np.flatnonzero(scores >= cutoff)
+                # Highest score first; ties nearest first, then catalog order
+                top = top[np.lexsort((kept[top], distances[i, kept[top]], -scores[top]))][:k]
+            else:
+                top = np.empty(0, dtype=int)
+            results.append({
+                "radius": float(radius[i]),
+                "total": int(counts[i]),
+                "positions": kept[top],
+                "scores": scores[top]
+            })
+        return results
+
+    def _rank_nearby(self, user_profile: Dict, exclude_mask: Optional[np.ndarray] = None,
+                     min_results: int = 3) -> Dict:
+        """Distance filter + preference scoring, reduced to a cacheable entry.
+
+        Widens through the radius tiers until min_results places remain
+        after dropping exclude_mask (3 for a new plan, 1 for a regenerate).
+        """
+        user_lat = user_profile["location"]["latitude"]
+        user_lon = user_profile["location"]["longitude"]
+        radius = user_profile["location"]["search_radius_km"]
+        max_places = user_profile["constraints"]["max_places"]
+        
+        # One distance pass, widening through the radius tiers as needed
+        positions, distances, radius = self.search_nearby(
+            user_lat, user_lon, radius,
+            min_results=min_results,
+            exclude_mask=exclude_mask
+        )
+        preferences = user_profile["preferences"]
+        candidates = {
+            "positions": positions,
+            "distances": distances,
+            "base_scores": self._base_scores(positions, preferences)
+        }
+        
+        # Score places by preferences
+        top_positions, top_scores = self._rank_candidates(
+            candidates, np.ones(len(positions), dtype=bool), max_places
+        )
+        
+        return {
+            "radius": radius,
+            "total": len(positions),
+            "positions": top_positions,
+            "scores": top_scores
+        }
+
+    @timed("batch_scoring")
+    def generate_batch_recommendations(self, user_profiles: List[Dict]) -> List[Dict]:
+        """Score many user profiles in bulk without sessions or narration.
+
+        Applies the same radius tiers and preference scoring as
+        generate_recommendations, but distances for a whole chunk of
+        profiles are one (profiles x places) matrix operation.
+        """
+        if not user_profiles:
+            return []
+        if self.size == 0:
+            return [{
+                "recommendations": [],
+                "search_radius_used": profile["location"]["search_radius_km"],
+                "total_places_found": 0
+            } for profile in user_profiles]
+
+        if self.executor is not None and len(user_profiles) > 1:
+            try:
+                return self.executor.score_profiles(user_profiles)
+            except Exception as e:
+                log.warning("executor.batch_failed", extra=fields(error=repr(e)))
+
+        chunk_size = max(1, BATCH_MATRIX_CELLS // self.size)
+        results = []
+        for start in range(0, len(user_profiles), chunk_size):
+            results.extend(self._score_profile_chunk(user_profiles[start:start + chunk_size]))
+        return results
+
+    def _score_profile_chunk(self, user_profiles: List[Dict]) -> List[Dict]:
+        """Rank one chunk of profiles against the full catalog"""
+        search_lat = np.array([p["location"]["latitude"] for p in user_profiles], dtype=float)
+        search_lon = np.array([p["location"]["longitude"] for p in user_profiles], dtype=float)
+        radius = np.array([p["location"]["search_radius_km"] for p in user_profiles], dtype=float)
+
+        distances = haversine_vector(search_lat[:, None], search_lon[:, None],
+                                     self.lat_arr[None, :], self.lon_arr[None, :])
+        # Same hard filters as generate_recommendations (open window, explicit rupee budget)
+        allowed = np.ones(distances.shape, dtype=bool)
+        for i, profile in enumerate(user_profiles):
+            ruled_out = self.ruled_out_mask(profile, None)
+            if ruled_out is not None:
+                allowed[i] = ~ruled_out
+        within = (distances <= radius[:, None]) & allowed
+        counts = within.sum(axis=1)
+
+        # Widen sparse profiles through the radius tiers, like search_nearby
+        for tier in RADIUS_TIERS_KM:
+            expand = np.flatnonzero((counts < 3) & (radius < tier))
+            if expand.size == 0:
+                continue
+            radius[expand] = tier
+            within[expand] = (distances[expand] <= tier) & allowed[expand]
+            counts[expand] = within[expand].sum(axis=1)
+
+        # Closer is better, normalized by the farthest place each profile kept
+        max_distance = np.where(within, distances, 0.0).max(axis=1)
+        safe_max = np.where(max_distance > 0, max_distance, 1.0)
+        distance_score = np.where(max_distance[:, None] > 0, 1 - distances / safe_max[:, None], 0.0)
+
+        scores = 0.3 * distance_score
+        for i, profile in enumerate(user_profiles):
+            scores[i] += self._mood_vector(profile["preferences"]["mood"])
+            scores[i] += self._budget_vector(profile["preferences"]["budget"])
+            scores[i] += self._weather_vector(profile["preferences"].get("weather"))
+        scores = np.where(within, scores, -np.inf)
+
+        results = []
+        for i, profile in enumerate(user_profiles):
+            max_places = min(profile["constraints"]["max_places"], int(counts[i]))
+            if max_places > 0:
+                top = np.argpartition(-scores[i], max_places - 1)[:max_places]
+                top = top[np.lexsort((distances[i, top], -scores[i, top]))]
+            else:
+                top = np.empty(0, dtype=int)
+
+            profile["location"]["search_radius_km"] = float(radius[i])
+            results.append({
+                "recommendations": self._format_recommendations(top, scores[i, top], profile),
+                "search_radius_used": float(radius[i]),
+                "total_places_found": int(counts[i])
+            })
+        return results
+
     def _generate_contextual_narration(self, user_profile: Dict, recommendations: List[Dict]) -> str:
         """Generate contextual narration based on user profile and recommendations"""
         if not recommendations:
@@ -296,8 +1100,8 @@ class EnhancedRAGPipeline:
                 return i
         return -1
     
-    def replace_visited_place(self, user_profile: Dict, current_recommendations: List[Dict], 
-                             visited_place_index: int) -> Dict:
+    def replace_visited_place(self, user_profile: Dict, current_recommendations: List[Dict],
+                             visited_place_index: int, session: Optional[Dict] = None) -> Dict:
         """Replace a visited place with similar alternative"""
         if visited_place_index < 0 or visited_place_index >= len(current_recommendations):
             return {
@@ -311,22 +1115,19 @@ class EnhancedRAGPipeline:
         visited_place = current_recommendations[visited_place_index]
         current_place_ids = [p["place_id"] for p in current_recommendations]
         
-        # Get all places in the area - use SAME radius as original search
-        user_lat = user_profile["location"]["latitude"]
-        user_lon = user_profile["location"]["longitude"]
-        radius = user_profile["location"]["search_radius_km"]
-        
-        # Get user's actual current location
-        current_lat = user_profile.get("current_location", {}).get("latitude", user_lat)
-        current_lon = user_profile.get("current_location", {}).get("longitude", user_lon)
-        
         # Use same radius as original search to maintain area consistency
-        nearby_places = self.filter_places_by_distance(user_lat, user_lon, radius)
-        
-        # Remove already recommended places
-        available_places = nearby_places[~nearby_places["place_id"].isin(current_place_ids)]
-        
-        if available_places.empty:
+        radius = user_profile["location"]["search_radius_km"]
+        candidates = self.session_candidates(user_profile, session)
+
+        # Remove already recommended places, the visited one and anything the session ruled out
+        self.mark_visited(session, visited_place["place_id"])
+        keep = ~np.isin(candidates["positions"], self.id_index.get_indexer(current_place_ids))
+        exclude_mask = self.ruled_out_mask(user_profile, session)
+        if exclude_mask is not None:
+            keep = keep & ~exclude_mask[candidates["positions"]]
+        available = int(keep.sum())
+
+        if available == 0:
             return {
                 "user_profile": user_profile,
                 "recommendations": current_recommendations,
@@ -335,36 +1136,21 @@ class EnhancedRAGPipeline:
                 "total_places_found": len(current_recommendations)
             }
         
-        # Score available places
-        scored_places = self.score_places_by_preferences(available_places, user_profile)
-        
         # Find best replacement
-        replacement_place = scored_places.iloc[0]
-        
-        # Calculate distance from user's current location
-        actual_distance = haversine(current_lat, current_lon, replacement_place["latitude"], replacement_place["longitude"])
-        
+        positions, scores = self._rank_candidates(candidates, keep, 1)
+        replacement = self._format_recommendations(positions, scores, user_profile)[0]
+
         # Create new recommendations list
         new_recommendations = current_recommendations.copy()
-        new_recommendations[visited_place_index] = {
-            "place_id": replacement_place["place_id"],
-            "place_name": replacement_place["place_name"],
-            "category": replacement_place["category"],
-            "distance_km": round(actual_distance, 2),
-            "visit_time_hr": user_profile["constraints"]["visit_time_per_place"],
-            "preference_score": round(replacement_place["preference_score"], 3),
-            "budget_range": f"₹{replacement_place['budget_min']}-{replacement_place['budget_max']}",
-            "famous_for": replacement_place["famous_for"],
-            "area": replacement_place["area"],
-            "maps_url": f"https://www.google.com/maps/search/?api=1&query={replacement_place["place_name"]}+{replacement_place["area"]}".replace(" ", "+")
-        }
-        
+        new_recommendations[visited_place_index] = replacement
+        self.mark_seen(session, [replacement])
+
         return {
             "user_profile": user_profile,
             "recommendations": new_recommendations,
-            "narration": f"I've replaced {visited_place['place_name']} with {replacement_place['place_name']}.",
+            "narration": f"I've replaced {visited_place['place_name']} with {replacement['place_name']}.",
             "search_radius_used": radius,
-            "total_places_found": len(available_places) + len(current_recommendations)
+            "total_places_found": available + len(current_recommendations)
         }
 
     def analyze_with_groq(self, user_message: str, current_recommendations: List[Dict]) -> str:
@@ -423,109 +1209,120 @@ Be smart about context:
 Respond with ONLY the command, nothing else:"""
         
         try:
-            import requests
-            import os
-            
             api_key = os.getenv("GROQ_API_KEY")
             
             if not api_key:
                 return "no_action"
             
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "llama-3.1-8b-instant",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.05,
-                    "max_tokens": 100
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                groq_response = result["choices"][0]["message"]["content"].strip().lower()
-                print(f"[GROQ DEBUG] User: '{user_message}' → Groq: '{groq_response}'")
-                return groq_response
-            else:
-                print(f"[GROQ ERROR] Status: {response.status_code}")
-                return "no_action"
+            # Identical prompts in flight at the same time share one upstream call
+            groq_response = outbound.coalesce("groq", prompt, self._ask_groq, prompt, api_key)
+            log.debug("groq.command", extra=fields(message=user_message, command=groq_response))
+            return groq_response
                 
         except Exception as e:
+            log.warning("groq.unavailable", extra=fields(error=repr(e)))
+            return "no_action"
+
+    def _ask_groq(self, prompt: str, api_key: str) -> str:
+        """One Groq completion, pooled, time-boxed and circuit-broken"""
+        response = outbound.request(
+            "groq", "POST", "/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": "llama-3.1-8b-instant",
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0.05,
+                "max_tokens": 100
+            }
+        )
+        
+        if response.status_code != 200:
+            log.warning("groq.http_error", extra=fields(status=response.status_code))
             return "no_action"
+        
+        result = response.json()
+        return result["choices"][0]["message"]["content"].strip().lower()
+
+
+    def _rank_unseen(self, user_profile: Dict, current_place_ids: List[str], session: Optional[Dict]) -> Dict:
+        """Rank places not shown yet and not ruled out, widening only when the session's candidates run out"""
+        # Everything shown so far plus the session's exclusions, as one mask
+        exclude_mask = self.ruled_out_mask(user_profile, session, include_seen=True)
+        if exclude_mask is None:
+            exclude_mask = np.zeros(self.size, dtype=bool)
+        current_positions = self.id_index.get_indexer(current_place_ids)
+        exclude_mask[current_positions[current_positions >= 0]] = True
+
+        candidates = self.session_candidates(user_profile, session)
+        keep = ~exclude_mask[candidates["positions"]]
+        if keep.any():
+            positions, scores = self._rank_candidates(candidates, keep, user_profile["constraints"]["max_places"])
+            return {
+                "radius": user_profile["location"]["search_radius_km"],
+                "total": int(keep.sum()),
+                "positions": positions,
+                "scores": scores
+            }
 
+        cache_key = self._result_cache_key(user_profile, exclude_mask)
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            cached = self._rank(user_profile, exclude_mask, min_results=1)
+            self.result_cache.set(cache_key, cached)
+        return cached
 
-    def regenerate_all_recommendations(self, user_profile: Dict, current_recommendations: List[Dict]) -> Dict:
+    def regenerate_all_recommendations(self, user_profile: Dict, current_recommendations: List[Dict],
+                                       session: Optional[Dict] = None) -> Dict:
         """Regenerate entire plan excluding current places"""
         current_place_ids = [p["place_id"] for p in current_recommendations]
+
+        cached = self._rank_unseen(user_profile, current_place_ids, session)
+        if cached["total"] == 0 and self.exclusion_mask(session, include_seen=True) is not None:
+            # Everything nearby has been shown once; start over from the session's exclusions
+            self._session_exclusions(session)["seen"][:] = 0
+            cached = self._rank_unseen(user_profile, current_place_ids, session)
+
+        radius = cached["radius"]
+        user_profile["location"]["search_radius_km"] = radius
         
-        user_lat = user_profile["location"]["latitude"]
-        user_lon = user_profile["location"]["longitude"]
-        radius = user_profile["location"]["search_radius_km"]
-        max_places = user_profile["constraints"]["max_places"]
-        
-        # Get user's actual current location
-        current_lat = user_profile.get("current_location", {}).get("latitude", user_lat)
-        current_lon = user_profile.get("current_location", {}).get("longitude", user_lon)
-        
-        nearby_places = self.filter_places_by_distance(user_lat, user_lon, radius)
-        available_places = nearby_places[~nearby_places["place_id"].isin(current_place_ids)]
-        
-        if available_places.empty:
-            user_profile["location"]["search_radius_km"] = min(radius * 1.5, 50)
-            return self.generate_recommendations(user_profile)
-        
-        scored_places = self.score_places_by_preferences(available_places, user_profile)
-        top_places = scored_places.head(max_places)
+        if cached["total"] == 0:
+            return {
+                "user_profile": user_profile,
+                "recommendations": current_recommendations,
+                "narration": "These are the only places I could find in this area. Try a different location!",
+                "search_radius_used": radius,
+                "total_places_found": len(current_recommendations)
+            }
         
-        recommendations = []
-        for _, place in top_places.iterrows():
-            # Calculate distance from user's current location
-            actual_distance = haversine(current_lat, current_lon, place["latitude"], place["longitude"])
-            
-            recommendations.append({
-                "place_id": place["place_id"],
-                "place_name": place["place_name"],
-                "category": place["category"],
-                "distance_km": round(actual_distance, 2),
-                "visit_time_hr": user_profile["constraints"]["visit_time_per_place"],
-                "preference_score": round(place["preference_score"], 3),
-                "budget_range": f"₹{place['budget_min']}-{place['budget_max']}",
-                "famous_for": place["famous_for"],
-                "area": place["area"],
-                "maps_url": f"https://www.google.com/maps/search/?api=1&query={place["place_name"]}+{place["area"]}".replace(" ", "+")
-            })
+        recommendations = self._format_recommendations(cached["positions"], cached["scores"], user_profile)
+        self.mark_seen(session, recommendations)
         
         return {
             "user_profile": user_profile,
             "recommendations": recommendations,
             "narration": "I've generated a fresh set of recommendations matching your preferences!",
             "search_radius_used": radius,
-            "total_places_found": len(available_places)
+            "total_places_found": cached["total"]
         }
 
-    def filter_by_category(self, user_profile: Dict, category: str) -> Dict:
+    def filter_by_category(self, user_profile: Dict, category: str, session: Optional[Dict] = None) -> Dict:
         """Filter recommendations by specific category"""
-        user_lat = user_profile["location"]["latitude"]
-        user_lon = user_profile["location"]["longitude"]
         radius = user_profile["location"]["search_radius_km"]
         max_places = user_profile["constraints"]["max_places"]
-        
-        # Get user's actual current location
-        current_lat = user_profile.get("current_location", {}).get("latitude", user_lat)
-        current_lon = user_profile.get("current_location", {}).get("longitude", user_lon)
-        
-        # Filter places by distance
-        nearby_places = self.filter_places_by_distance(user_lat, user_lon, radius)
-        
-        # Filter by category (case-insensitive partial match)
-        category_places = nearby_places[nearby_places["category"].str.lower().str.contains(category.lower(), na=False)]
-        
-        if category_places.empty:
+
+        # Filter the session's nearby candidates by category (case-insensitive partial match)
+        self.include_category_for_session(session, category)
+        candidates = self.session_candidates(user_profile, session)
+        keep = self._category_mask(candidates["positions"], category)
+        exclude_mask = self.ruled_out_mask(user_profile, session)
+        if exclude_mask is not None:
+            keep = keep & ~exclude_mask[candidates["positions"]]
+        total = int(keep.sum())
+
+        if total == 0:
             return {
                 "user_profile": user_profile,
                 "recommendations": [],
@@ -533,55 +1330,34 @@ Respond with ONLY the command, nothing else:"""
                 "search_radius_used": radius,
                 "total_places_found": 0
             }
-        
-        # Score places by preferences
-        scored_places = self.score_places_by_preferences(category_places, user_profile)
-        top_places = scored_places.head(max_places)
-        
-        recommendations = []
-        for _, place in top_places.iterrows():
-            # Calculate distance from user's current location
-            actual_distance = haversine(current_lat, current_lon, place["latitude"], place["longitude"])
-            
-            recommendations.append({
-                "place_id": place["place_id"],
-                "place_name": place["place_name"],
-                "category": place["category"],
-                "distance_km": round(actual_distance, 2),
-                "visit_time_hr": user_profile["constraints"]["visit_time_per_place"],
-                "preference_score": round(place["preference_score"], 3),
-                "budget_range": f"₹{place['budget_min']}-{place['budget_max']}",
-                "famous_for": place["famous_for"],
-                "area": place["area"],
-                "maps_url": f"https://www.google.com/maps/search/?api=1&query={place["place_name"]}+{place["area"]}".replace(" ", "+")
-            })
-        
+
+        positions, scores = self._rank_candidates(candidates, keep, max_places)
+        recommendations = self._format_recommendations(positions, scores, user_profile)
+        self.mark_seen(session, recommendations)
+
         return {
             "user_profile": user_profile,
             "recommendations": recommendations,
             "narration": f"Here are {len(recommendations)} {category} places in your area!",
             "search_radius_used": radius,
-            "total_places_found": len(category_places)
+            "total_places_found": total
         }
 
-    def exclude_category(self, user_profile: Dict, exclude_category: str) -> Dict:
+    def exclude_category(self, user_profile: Dict, exclude_category: str, session: Optional[Dict] = None) -> Dict:
         """Exclude a category and show different recommendations"""
-        user_lat = user_profile["location"]["latitude"]
-        user_lon = user_profile["location"]["longitude"]
         radius = user_profile["location"]["search_radius_km"]
         max_places = user_profile["constraints"]["max_places"]
-        
-        # Get user's actual current location
-        current_lat = user_profile.get("current_location", {}).get("latitude", user_lat)
-        current_lon = user_profile.get("current_location", {}).get("longitude", user_lon)
-        
-        # Filter places by distance
-        nearby_places = self.filter_places_by_distance(user_lat, user_lon, radius)
-        
-        # Exclude the specified category
-        filtered_places = nearby_places[~nearby_places["category"].str.lower().str.contains(exclude_category.lower(), na=False)]
-        
-        if filtered_places.empty:
+
+        # Exclude the specified category (and it stays excluded for the session)
+        self.exclude_category_for_session(session, exclude_category)
+        candidates = self.session_candidates(user_profile, session)
+        keep = ~self._category_mask(candidates["positions"], exclude_category)
+        exclude_mask = self.ruled_out_mask(user_profile, session)
+        if exclude_mask is not None:
+            keep = keep & ~exclude_mask[candidates["positions"]]
+        total = int(keep.sum())
+
+        if total == 0:
             return {
                 "user_profile": user_profile,
                 "recommendations": [],
@@ -589,66 +1365,51 @@ Respond with ONLY the command, nothing else:"""
                 "search_radius_used": radius,
                 "total_places_found": 0
             }
-        
-        # Score places by preferences
-        scored_places = self.score_places_by_preferences(filtered_places, user_profile)
-        top_places = scored_places.head(max_places)
-        
-        recommendations = []
-        for _, place in top_places.iterrows():
-            # Calculate distance from user's current location
-            actual_distance = haversine(current_lat, current_lon, place["latitude"], place["longitude"])
-            
-            recommendations.append({
-                "place_id": place["place_id"],
-                "place_name": place["place_name"],
-                "category": place["category"],
-                "distance_km": round(actual_distance, 2),
-                "visit_time_hr": user_profile["constraints"]["visit_time_per_place"],
-                "preference_score": round(place["preference_score"], 3),
-                "budget_range": f"₹{place['budget_min']}-{place['budget_max']}",
-                "famous_for": place["famous_for"],
-                "area": place["area"],
-                "maps_url": f"https://www.google.com/maps/search/?api=1&query={place["place_name"]}+{place["area"]}".replace(" ", "+")
-            })
-        
+
+        positions, scores = self._rank_candidates(candidates, keep, max_places)
+        recommendations = self._format_recommendations(positions, scores, user_profile)
+        self.mark_seen(session, recommendations)
+
         return {
             "user_profile": user_profile,
             "recommendations": recommendations,
             "narration": f"Got it! Here are {len(recommendations)} places excluding {exclude_category}.",
             "search_radius_used": radius,
-            "total_places_found": len(filtered_places)
+            "total_places_found": total
         }
 
-    def handle_chat_modification(self, user_profile: Dict, current_recommendations: List[Dict], 
-                                chat_message: str) -> Dict:
-        """Handle chat-based modifications to recommendations"""
+    def handle_chat_modification(self, user_profile: Dict, current_recommendations: List[Dict],
+                                chat_message: str, session: Optional[Dict] = None) -> Dict:
+        """Handle chat-based modifications to recommendations.
+
+        Pass the session dict to reuse its cached nearby candidates across turns.
+        """
         # Use Groq to analyze user intent
         groq_command = self.analyze_with_groq(chat_message, current_recommendations)
         
         # Process the Groq command
         if groq_command.startswith("exclude_category:"):
             category = groq_command.replace("exclude_category:", "").strip()
-            return self.exclude_category(user_profile, category)
+            return self.exclude_category(user_profile, category, session)
         
         elif groq_command.startswith("category:"):
             category = groq_command.replace("category:", "").strip()
-            return self.filter_by_category(user_profile, category)
+            return self.filter_by_category(user_profile, category, session)
         
         elif "regenerate_all" in groq_command:
-            return self.regenerate_all_recommendations(user_profile, current_recommendations)
+            return self.regenerate_all_recommendations(user_profile, current_recommendations, session)
         
         elif groq_command.startswith("i've visited"):
             place_name = groq_command.replace("i've visited ", "").strip()
             visited_place_index = self.find_mentioned_place(place_name, current_recommendations)
             if visited_place_index >= 0:
-                return self.replace_visited_place(user_profile, current_recommendations, visited_place_index)
+                return self.replace_visited_place(user_profile, current_recommendations, visited_place_index, session)
         
         elif "show me more options" in groq_command:
-            user_profile["location"]["search_radius_km"] = min(
-                user_profile["location"]["search_radius_km"] * 1.5, 50
+            user_profile["location"]["search_radius_km"] = self._next_radius_tier(
+                user_profile["location"]["search_radius_km"]
             )
-            return self.generate_recommendations(user_profile)
+            return self.generate_recommendations(user_profile, session)
         
         elif "general_conversation" in groq_command:
             return {
@@ -668,5 +1429,5 @@ Respond with ONLY the command, nothing else:"""
             "total_places_found": len(current_recommendations)
         }
 
-# Global instance
-enhanced_pipeline = EnhancedRAGPipeline()
\ No newline at end of file
+# Global instance; the catalog is loaded at app startup
+enhanced_pipeline = EnhancedRAGPipeline(autoload=False)
\ No newline at end of file
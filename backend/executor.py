@@ -0,0 +1,163 @@
+"""
+Optional process-pool offload for CPU-bound ranking.
+
+In "process" mode, nearby ranking and batch scoring run in worker
+processes attached to the shared catalog segment (see catalog_store.py),
+so scoring scales across cores instead of contending for the GIL on
+FastAPI's threadpool. Ranking requests that queue up while the workers
+are busy are sent together as one task, which amortizes the IPC.
+
+    SANCHAR_RANKING_EXECUTOR=process SANCHAR_RANKING_PROCESSES=4 uvicorn main:app
+"""
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+from logger import get_logger, fields
+from metrics import RANKING_BATCH_SIZE
+
+log = get_logger("executor")
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+
+RANKING_EXECUTOR = os.getenv("SANCHAR_RANKING_EXECUTOR", "thread")
+RANKING_PROCESSES = int(os.getenv("SANCHAR_RANKING_PROCESSES", "0")) or os.cpu_count() or 1
+
+# Ranking requests sent to a worker in one task, and tasks in flight per worker
+MAX_TASKS_PER_BATCH = 32
+INFLIGHT_PER_PROCESS = 2
+
+# -----------------------------
+# WORKER SIDE
+# -----------------------------
+
+_worker_pipeline = None
+
+def _init_worker(directory: str):
+    global _worker_pipeline
+    from enhanced_pipeline import EnhancedRAGPipeline
+    _worker_pipeline = EnhancedRAGPipeline(autoload=False)
+    _worker_pipeline.load_shared(directory)
+
+def _attached(directory: str, version: str):
+    """The worker's pipeline, re-attached if the parent moved to a new catalog version"""
+    if _worker_pipeline.catalog_version != version:
+        _worker_pipeline.load_shared(directory)
+    return _worker_pipeline
+
+def _rank_batch(directory: str, version: str, tasks: List[tuple]) -> List[Dict]:
+    pipeline = _attached(directory, version)
+    requests = []
+    for user_profile, packed_mask, min_results in tasks:
+        exclude_mask = None
+        if packed_mask is not None:
+            exclude_mask = np.unpackbits(packed_mask, count=pipeline.size).astype(bool)
+        requests.append((user_profile, exclude_mask, min_results))
+    return pipeline._rank_nearby_batch(requests)
+
+def _score_profiles(directory: str, version: str, user_profiles: List[Dict]) -> List[Dict]:
+    return _attached(directory, version).generate_batch_recommendations(user_profiles)
+
+# -----------------------------
+# PARENT SIDE
+# -----------------------------
+
+class ProcessRankingExecutor:
+    """Dispatches ranking work from request threads to a process pool"""
+
+    def __init__(self, pipeline, directory: str, processes: int = RANKING_PROCESSES):
+        self.pipeline = pipeline
+        self.directory = directory
+        self.processes = processes
+        self.pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(directory,)
+        )
+        self._pending = queue.Queue()
+        self._inflight = threading.BoundedSemaphore(processes * INFLIGHT_PER_PROCESS)
+        self._dispatcher = threading.Thread(target=self._dispatch, name="ranking-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def rank_many(self, requests: List[tuple]) -> List[Dict]:
+        """Blocking equivalent of pipeline._rank_nearby_batch, computed in workers"""
+        futures = []
+        for user_profile, exclude_mask, min_results in requests:
+            packed = None if exclude_mask is None else np.packbits(exclude_mask)
+            future = Future()
+            self._pending.put(((user_profile, packed, min_results), future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def score_profiles(self, user_profiles: List[Dict]) -> List[Dict]:
+        """Blocking equivalent of generate_batch_recommendations, split across workers"""
+        chunk = -(-len(user_profiles) // self.processes)
+        futures = [
+            self.pool.submit(_score_profiles, self.directory, self.pipeline.catalog_version,
+                             user_profiles[start:start + chunk])
+            for start in range(0, len(user_profiles), chunk)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def _dispatch(self):
+        """Send whatever queued up while workers were busy as a single task"""
+        while True:
+            items = [self._pending.get()]
+            if items[0] is None:
+                return
+            self._inflight.acquire()
+            while len(items) < MAX_TASKS_PER_BATCH:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)
+                    break
+                items.append(item)
+
+            RANKING_BATCH_SIZE.observe(len(items), mode="process")
+            try:
+                task = self.pool.submit(_rank_batch, self.directory, self.pipeline.catalog_version,
+                                        [request for request, _ in items])
+            except Exception as e:
+                self._inflight.release()
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            task.add_done_callback(lambda done, items=items: self._deliver(done, items))
+
+    def _deliver(self, done: Future, items: List[tuple]):
+        self._inflight.release()
+        try:
+            results = done.result()
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            future.set_result(result)
+
+    def shutdown(self):
+        self._pending.put(None)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+def start_process_executor(pipeline, directory: str = "", processes: int = RANKING_PROCESSES):
+    """Attach the pipeline to a shared segment and hand its ranking to worker processes"""
+    directory = directory or os.path.join(tempfile.gettempdir(), "sanchar-catalog")
+    pipeline.load_shared(directory)
+    pipeline.executor = ProcessRankingExecutor(pipeline, directory, processes)
+    # The dispatcher already batches queued requests; a thread batcher would serialize them
+    pipeline.batcher = None
+    log.info("executor.started", extra=fields(mode="process", processes=processes, directory=directory))
+    return pipeline.executor
@@ -1,8 +1,12 @@
 import ast
 import os
 from math import radians, sin, cos, sqrt, atan2
+import numpy as np
 import pandas as pd
-import requests
+import outbound
+from logger import get_logger, fields
+
+log = get_logger("helpers")
 
 # -------------------------
 # MOOD → TAG MAP (USED BY agents.py)
@@ -54,6 +58,49 @@ def haversine(lat1, lon1, lat2, lon2):
     a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
     return R * 2 * atan2(sqrt(a), sqrt(1 - a))
 
+def haversine_vector(lat1, lon1, lat2, lon2):
+    """
+    NumPy haversine in km. Inputs broadcast, so a column of origins
+    against a row of places gives the full distance matrix in one call.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+
+    R = 6371
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+# -------------------------
+# GEOHASH (LOCATION QUANTIZATION)
+# -------------------------
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat, lon, precision=7):
+    """
+    Standard geohash; precision 7 is a ~150 m cell, 6 is ~1.2 km.
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    lat, lon = float(lat), float(lon)
+    chars, bits, ch, even = [], 0, 0, True
+
+    while len(chars) < precision:
+        rng, val = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if val >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch = ch << 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[ch])
+            bits, ch = 0, 0
+
+    return "".join(chars)
+
 # -------------------------
 # VISIT TIME
 # -------------------------
@@ -73,10 +120,10 @@ def estimate_visit_time(category):
 # -------------------------
 # DATA LOADING
 # -------------------------
+PLACES_CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "places_final_ai_ready.csv")
+
 def load_places_data():
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_path = os.path.join(base_dir, "data", "places_final_ai_ready.csv")
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(PLACES_CSV_PATH)
     return df.to_dict(orient="records")
 
 # -------------------------
@@ -118,11 +165,10 @@ def geocode_place(place_name):
         return fallback_map[key]
 
     try:
-        res = requests.get(
-            "https://nominatim.openstreetmap.org/search",
+        res = outbound.request(
+            "nominatim", "GET", "/search",
             params={"q": place_name, "format": "json", "limit": 1},
-            headers={"User-Agent": "SancharAI/1.0"},
-            timeout=10
+            headers={"User-Agent": "SancharAI/1.0"}
         )
 
         if res.status_code != 200:
@@ -135,7 +181,11 @@ def geocode_place(place_name):
         return float(data[0]["lat"]), float(data[0]["lon"])
 
     except Exception as e:
-        print("Geocoding failed:", e)
+        log.warning("geocode.failed", extra=fields(place=place_name, error=repr(e)))
+        # Upstream down or slow: settle for a known area named in the query
+        for name, coords in fallback_map.items():
+            if name in key:
+                return coords
         return None, None
 
 # =====================================================
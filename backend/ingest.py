@@ -0,0 +1,158 @@
+"""
+Streaming ingestion of place datasets into the shared catalog segment.
+
+Reads CSV or JSONL a chunk at a time, validates and normalizes each chunk,
+derives the scoring columns with the same functions EnhancedRAGPipeline uses,
+and appends them to a catalog_store.SegmentWriter. Memory stays at one
+chunk plus a few dozen bytes per row (the id hashes used to drop duplicate
+place_ids and build the id index), however large the inputs are.
+
+    python ingest.py data/bengaluru.csv data/mysuru.jsonl /var/lib/sanchar/catalog
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Iterator, List
+import numpy as np
+import pandas as pd
+import catalog_store
+from enhanced_pipeline import segment_columns, frame_version
+from helpers import safe_list
+from logger import get_logger, fields
+
+log = get_logger("ingest")
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+
+CHUNK_ROWS = int(os.getenv("SANCHAR_INGEST_CHUNK_ROWS", "50000"))
+
+# Columns the pipeline reads; missing ones are added empty
+CATALOG_COLUMNS = [
+    "place_id", "place_name", "category", "vibe", "tags", "area", "latitude", "longitude",
+    "open_time", "close_time", "famous_for", "weather_suitability", "budget_min", "budget_max"
+]
+LIST_COLUMNS = ["tags", "weather_suitability"]
+
+# -----------------------------
+# READERS
+# -----------------------------
+
+def read_chunks(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """DataFrames of up to chunk_rows raw rows from a .csv or .jsonl file"""
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            rows = []
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    rows.append({})  # counted as missing_id by clean_chunk
+                if len(rows) >= chunk_rows:
+                    yield pd.DataFrame(rows)
+                    rows = []
+            if rows:
+                yield pd.DataFrame(rows)
+        return
+
+    yield from pd.read_csv(path, chunksize=chunk_rows, dtype=str)
+
+# -----------------------------
+# VALIDATION / NORMALIZATION
+# -----------------------------
+
+def _reject(stats: Dict, reason: str, count: int):
+    if count:
+        stats["rejected"][reason] = stats["rejected"].get(reason, 0) + int(count)
+
+def clean_chunk(raw: pd.DataFrame, stats: Dict) -> pd.DataFrame:
+    """Drop invalid rows, normalize coordinates and canonicalize list columns"""
+    stats["rows"] += len(raw)
+    chunk = raw.copy()
+    for col in CATALOG_COLUMNS:
+        if col not in chunk.columns:
+            chunk[col] = np.nan
+
+    place_id = chunk["place_id"].astype("string").str.strip()
+    valid = place_id.notna() & (place_id != "")
+    _reject(stats, "missing_id", (~valid).sum())
+    chunk["place_id"] = place_id
+
+    lat = pd.to_numeric(chunk["latitude"], errors="coerce")
+    lon = pd.to_numeric(chunk["longitude"], errors="coerce")
+    in_range = lat.between(-90, 90) & lon.between(-180, 180)
+    _reject(stats, "bad_coordinates", (valid & ~in_range).sum())
+    valid &= in_range
+
+    chunk = chunk[valid.to_numpy(dtype=bool)].copy()
+    chunk["place_id"] = chunk["place_id"].astype(object)
+    chunk["latitude"] = lat[valid].round(6).to_numpy(dtype=float)
+    chunk["longitude"] = lon[valid].round(6).to_numpy(dtype=float)
+
+    # List columns end up in their canonical "['a', 'b']" form, whatever the input used
+    for col in LIST_COLUMNS:
+        chunk[col] = [str([str(v).strip() for v in safe_list(value)]) for value in chunk[col]]
+    return chunk.reset_index(drop=True)
+
+# -----------------------------
+# BUILD
+# -----------------------------
+
+def build_catalog(paths: List[str], directory: str, chunk_rows: int = CHUNK_ROWS) -> Dict:
+    """
+    Ingest every file in order into a new segment under directory and
+    publish it. The first row seen for a place_id wins; later duplicates
+    (within or across files) are dropped.
+    """
+    writer = catalog_store.SegmentWriter(directory)
+    digest = hashlib.blake2b(digest_size=6)
+    # Part of the version, so a format change never reuses an old layout's directory
+    digest.update(f"format-{catalog_store.FORMAT_VERSION}".encode("ascii"))
+    stats = {"rows": 0, "rejected": {}, "duplicates": 0}
+    try:
+        for path in paths:
+            for raw in read_chunks(path, chunk_rows):
+                chunk = clean_chunk(raw, stats)
+                if chunk.empty:
+                    continue
+                numeric, strings = segment_columns(chunk)
+                numeric["id_hash"] = catalog_store.id_hashes(chunk["place_id"])
+                writer.append(numeric, strings)
+                digest.update(frame_version(chunk).encode("ascii"))
+
+        hashes = writer.staged("id_hash") if writer.rows else np.empty(0, dtype=np.uint64)
+        _, first = np.unique(hashes, return_index=True)
+        keep = np.zeros(writer.rows, dtype=bool)
+        keep[first] = True
+        stats["duplicates"] = writer.rows - len(first)
+
+        kept_hashes = np.asarray(hashes[keep])
+        order = np.argsort(kept_hashes, kind="stable")
+        version = digest.hexdigest()
+        manifest = writer.finish(
+            version,
+            [catalog_store.source_stamp(path) for path in paths],
+            keep,
+            extra_numeric={"id_hash_sorted": kept_hashes[order], "id_order": order}
+        )
+    except BaseException:
+        writer.abort()
+        raise
+
+    log.info("ingest.done", extra=fields(
+        places=manifest["size"], version=version, directory=directory, **stats
+    ))
+    return manifest
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("usage: python ingest.py <input.csv|input.jsonl>... <directory>")
+    *inputs, target = sys.argv[1:]
+    with catalog_store.build_lock(target):
+        result = build_catalog(inputs, target)
+    print(f"catalog {result['version']}: {result['size']} places in {target}")
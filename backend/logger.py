@@ -0,0 +1,155 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction of DEBUG records kept when DEBUG is enabled
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+LOG_QUEUE_SIZE = 10000
+
+# Redaction limits for structured fields
+MAX_FIELD_CHARS = 200
+MAX_FIELD_ITEMS = 5
+MAX_FIELD_DEPTH = 2
+
+# -----------------------------
+# REDACTION
+# -----------------------------
+
+def redact(value, depth: int = 0):
+    """
+    Bound the size of a logged value: long strings are truncated and
+    large or deeply nested containers are replaced by a short summary,
+    so a log line never grows with session size.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+
+    if isinstance(value, str):
+        if len(value) > MAX_FIELD_CHARS:
+            return value[:MAX_FIELD_CHARS] + f"...<{len(value)} chars>"
+        return value
+
+    if isinstance(value, dict):
+        if depth >= MAX_FIELD_DEPTH or len(value) > MAX_FIELD_ITEMS:
+            return f"<dict keys={list(value)[:MAX_FIELD_ITEMS]} len={len(value)}>"
+        return {str(k): redact(v, depth + 1) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple, set)):
+        if depth >= MAX_FIELD_DEPTH or len(value) > MAX_FIELD_ITEMS:
+            return f"<{type(value).__name__} len={len(value)}>"
+        return [redact(v, depth + 1) for v in value]
+
+    return redact(str(value), depth)
+
+def fields(**kwargs) -> dict:
+    """Structured fields for a log call: logger.info("event", extra=fields(a=1))"""
+    return {"fields": kwargs}
+
+# -----------------------------
+# FORMATTING / FILTERING
+# -----------------------------
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; runs on the listener thread"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class DebugSampler(logging.Filter):
+    """Keep only a sample of DEBUG records; other levels always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        return random.random() < self.rate
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread without formatting them here.
+    Structured fields are redacted on the caller's thread (bounded cost);
+    when the queue is full the record is dropped instead of blocking.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if getattr(record, "fields", None):
+            record.fields = {k: redact(v) for k, v in record.fields.items()}
+        # Resolve %-args now so the listener never sees mutable request state
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+# -----------------------------
+# SETUP
+# -----------------------------
+
+_listener = None
+_queue_handler = None
+
+def setup_logging():
+    """Route the "sanchar" logger through a background queue listener (idempotent)"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        return
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(DebugSampler(LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger("sanchar")
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_queue_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler else 0
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(f"sanchar.{name}")
@@ -1,25 +1,74 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Optional
-from routes import places, plans, schedule
+from routes import places, plans, schedule, recommendations
 import uuid
+import math
 import time
+import threading
 from pipeline import generate_hangout_plan
-from agents import agent_1_intent_builder
+from agents import agent_1_intent_builder, get_genai
 from store import create_session, get_session, update_session
 from enhanced_pipeline import enhanced_pipeline
+from responses import FastJSONResponse, serialize_with_etag, conditional_json_response
+from metrics import HTTP_LATENCY, timed, render_prometheus, stats_summary
+from logger import get_logger, fields, dropped_records
+from outbound import breaker_states, admission_states
+from ratelimit import admit_llm_turn, client_address
+from weather import resolve_weather
+from catalog_store import CATALOG_DIR
+import executor
+import logging
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="Sanchar AI")
+log = get_logger("main")
+
+# -----------------------------
+# STARTUP
+# -----------------------------
+
+def warm_up():
+    """Load the catalog, then the Gemini SDK, off the startup path"""
+    started = time.perf_counter()
+    if executor.RANKING_EXECUTOR == "process":
+        # Ranking runs in worker processes attached to the shared catalog
+        executor.start_process_executor(enhanced_pipeline, CATALOG_DIR)
+    elif CATALOG_DIR:
+        # Multi-worker mode: attach the shared memory-mapped catalog
+        enhanced_pipeline.load_shared(CATALOG_DIR)
+    else:
+        enhanced_pipeline.load_data()
+    log.info("startup.catalog_ready", extra=fields(
+        seconds=round(time.perf_counter() - started, 3), ready=enhanced_pipeline.ready
+    ))
+    try:
+        get_genai()
+    except Exception as e:
+        log.warning("startup.genai_unavailable", extra=fields(error=repr(e)))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The worker accepts connections (and answers liveness) right away;
+    # readiness flips once the catalog is in memory
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+    if enhanced_pipeline.executor is not None:
+        enhanced_pipeline.executor.shutdown()
+
+app = FastAPI(title="Sanchar AI", default_response_class=FastJSONResponse, lifespan=lifespan)
 
 app.include_router(places.router)
 app.include_router(plans.router)
 app.include_router(schedule.router)
+app.include_router(recommendations.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,8 +78,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large bodies (shared plans, recommendation lists); brotli when installed
+COMPRESSION_MIN_BYTES = 1024
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_BYTES, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Route template, not the raw path, keeps label cardinality bounded
+    route = request.scope.get("route")
+    HTTP_LATENCY.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code
+    )
+    return response
+
 # Enhanced RAG Pipeline with Groq is the primary approach
-print("✅ Enhanced RAG Pipeline (Groq) initialized")
+log.info("pipeline.initialized", extra=fields(pipeline="groq_rag"))
 
 # In-memory storage for share tokens
 share_tokens = {}
@@ -46,6 +117,8 @@ class ChatRequest(BaseModel):
     weather: Optional[str] = None
     use_enhanced_rag: Optional[bool] = True  # Flag to use enhanced RAG with Groq
     use_current_location: Optional[bool] = False  # Flag for Nearby button
+    open_now: Optional[bool] = False  # Only places open from now for the plan's length
+    visit_window: Optional[str] = None  # e.g. "6-8pm": only places open then
 
 @app.post("/chat/start")
 def start_chat(req: StartChatRequest):
@@ -55,33 +128,76 @@ def start_chat(req: StartChatRequest):
         "start_lon": req.start_lon
     }
     update_session(sid, session_data)
-    print(f"Created session {sid} with data: {session_data}")
+    log.info("session.created", extra=fields(session_id=sid, **session_data))
     return {"session_id": sid}
 
+def client_ip(request: Request) -> str:
+    """Per-user address for rate limiting, seen through trusted proxies (see ratelimit.TRUSTED_PROXIES)"""
+    peer = request.client.host if request.client else "unknown"
+    return client_address(peer, request.headers.get("x-forwarded-for", ""))
+
 @app.post("/chat")
-def chat(req: ChatRequest):
+def chat(req: ChatRequest, request: Request):
+    # Until warm-up has loaded the catalog every plan would come back empty
+    if not enhanced_pipeline.ready:
+        return FastJSONResponse(
+            {"status": "starting", "narration": "Sanchar is starting up. Please try again in a moment.",
+             "optimized_plan": []},
+            status_code=503
+        )
     try:
-        print(f"Looking for session: {req.session_id}")
-        state = get_session(req.session_id)
-        print(f"Found session state: {state}")
+        with timed("session_load"):
+            state = get_session(req.session_id)
+        log.info("chat.request", extra=fields(
+            session_id=req.session_id,
+            found=state is not None,
+            enhanced=req.use_enhanced_rag
+        ))
+        if state and log.isEnabledFor(logging.DEBUG):
+            # Sampled, and large values are summarized by the handler
+            log.debug("chat.session_state", extra=fields(session_id=req.session_id, state=state))
         
         if not state:
             return {"narration": "Session expired. Please refresh and try again.", "optimized_plan": []}
 
+        # Only turns that reach Groq or Gemini are charged to the LLM rate limits
+        if calls_llm(req, state):
+            retry_after = admit_llm_turn(req.session_id, client_ip(request))
+            if retry_after > 0:
+                log.info("chat.rate_limited", extra=fields(
+                    session_id=req.session_id, retry_after=round(retry_after, 1)
+                ))
+                return FastJSONResponse(
+                    {"narration": "You're sending messages too quickly. Please wait a moment and try again.",
+                     "optimized_plan": []},
+                    status_code=429,
+                    headers={"Retry-After": str(math.ceil(retry_after))}
+                )
+
         # Use Enhanced RAG Pipeline (Groq)
         if req.use_enhanced_rag:
-            return handle_enhanced_rag_chat(req, state)
+            result = handle_enhanced_rag_chat(req, state)
         
         # Fallback to original pipeline
         else:
-            return handle_original_chat(req, state)
+            result = handle_original_chat(req, state)
+        
+        # Returned directly so FastAPI skips jsonable_encoder
+        return FastJSONResponse(result)
         
     except Exception as e:
-        print(f"Chat error: {e}")
+        log.exception("chat.error", extra=fields(session_id=req.session_id))
         return {"narration": f"Error: {str(e)}", "optimized_plan": []}
 
 
 
+def calls_llm(req: ChatRequest, state: dict) -> bool:
+    """Whether a turn reaches an LLM: Groq for enhanced follow-ups, Gemini narration for
+    legacy new plans. Enhanced initial plans use template narration."""
+    if req.use_enhanced_rag:
+        return "user_profile" in state
+    return original_chat_action(req.message) == "plan"
+
 def handle_enhanced_rag_chat(req: ChatRequest, state: dict) -> dict:
     """Handle chat using enhanced RAG pipeline"""
     try:
@@ -98,11 +214,13 @@ def handle_enhanced_rag_chat(req: ChatRequest, state: dict) -> dict:
                 lat=state["start_lat"],
                 lon=state["start_lon"],
                 preferred_location=req.preferred_location or "",
-                use_current_location=req.use_current_location or False
+                use_current_location=req.use_current_location or False,
+                open_window=enhanced_pipeline.open_window(time, req.visit_window, req.open_now or False),
+                weather=resolve_weather(req.weather, state["start_lat"], state["start_lon"])
             )
             
             # Generate recommendations
-            result = enhanced_pipeline.generate_recommendations(user_profile)
+            result = enhanced_pipeline.generate_recommendations(user_profile, session=state)
             
             # Store in session
             state["user_profile"] = result["user_profile"]
@@ -123,7 +241,8 @@ def handle_enhanced_rag_chat(req: ChatRequest, state: dict) -> dict:
             result = enhanced_pipeline.handle_chat_modification(
                 user_profile=state["user_profile"],
                 current_recommendations=state.get("current_recommendations", []),
-                chat_message=req.message
+                chat_message=req.message,
+                session=state
             )
             
             # Update session
@@ -141,7 +260,7 @@ def handle_enhanced_rag_chat(req: ChatRequest, state: dict) -> dict:
             }
             
     except Exception as e:
-        print(f"Enhanced RAG error: {e}")
+        log.exception("chat.enhanced_rag_error", extra=fields(session_id=req.session_id))
         return {"narration": f"Error processing request: {str(e)}", "optimized_plan": []}
 
 def parse_initial_message(message: str) -> tuple:
@@ -152,14 +271,23 @@ def parse_initial_message(message: str) -> tuple:
     time = parts[2] if len(parts) > 2 else "2-4"
     return mood, budget, time
 
+def original_chat_action(message: str) -> str:
+    """"replace", "remove" or "plan" (a new plan) for an original-pipeline message"""
+    message = message.lower()
+    if "change" in message or "replace" in message:
+        return "replace"
+    if "remove" in message or "delete" in message:
+        return "remove"
+    return "plan"
+
 def handle_original_chat(req: ChatRequest, state: dict) -> dict:
     """Handle chat using original pipeline (fallback)"""
     # Check if user wants to modify places
-    message = req.message.lower()
-    if "change" in message or "replace" in message:
+    action = original_chat_action(req.message)
+    if action == "replace":
         result = handle_place_replacement(req, state)
         return result
-    elif "remove" in message or "delete" in message:
+    elif action == "remove":
         result = handle_place_removal(req, state)
         return result
     
@@ -319,7 +447,7 @@ def update_search_radius(session_id: str, radius_km: float):
         update_session(session_id, state)
         
         # Regenerate recommendations with new radius
-        result = enhanced_pipeline.generate_recommendations(state["user_profile"])
+        result = enhanced_pipeline.generate_recommendations(state["user_profile"], session=state)
         state["current_recommendations"] = result["recommendations"]
         update_session(session_id, state)
         
@@ -333,22 +461,53 @@ def update_search_radius(session_id: str, radius_km: float):
         }
     
     return {"message": "Radius updated", "radius_km": radius_km}
+@app.get("/health/live")
+def liveness():
+    """The process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    """503 until the catalog is loaded, so no traffic is routed here before then"""
+    if not enhanced_pipeline.ready:
+        return FastJSONResponse({"status": "starting"}, status_code=503)
+    return {"status": "ready", "places": enhanced_pipeline.size, "catalog_version": enhanced_pipeline.catalog_version}
+
 @app.get("/system/stats")
 def get_system_stats():
     """Get system statistics"""
     return {
         "enhanced_pipeline": "available",
-        "pipeline": "groq_rag"
+        "pipeline": "groq_rag",
+        "catalog": {
+            "places": enhanced_pipeline.size,
+            "version": enhanced_pipeline.catalog_version,
+            "shared_dir": enhanced_pipeline.shared_dir
+        },
+        "result_cache": enhanced_pipeline.result_cache.stats(),
+        "log_records_dropped": dropped_records(),
+        "circuit_breakers": breaker_states(),
+        "upstream_admission": admission_states(),
+        **stats_summary()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of latency histograms and counters"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.post("/share/generate")
 def generate_share_token(req: dict):
     """Generate a new share token with expiration"""
     token = str(uuid.uuid4())[:8]  # Short token
     expiry = time.time() + 300  # 5 minutes from now
     
+    # Payload is immutable for the token's lifetime; serialize once for all viewers
+    body, etag = serialize_with_etag(req)
     share_tokens[token] = {
         "data": req,
+        "body": body,
+        "etag": etag,
         "expiry": expiry,
         "created": time.time()
     }
@@ -356,7 +515,7 @@ def generate_share_token(req: dict):
     return {"token": token, "path": f"/plan/{token}"}
 
 @app.get("/share/{token}")
-def get_shared_plan(token: str):
+def get_shared_plan(token: str, request: Request):
     """Retrieve shared plan by token"""
     if token not in share_tokens:
         raise HTTPException(status_code=404, detail="Link expired or invalid")
@@ -368,5 +527,10 @@ def get_shared_plan(token: str):
         del share_tokens[token]  # Clean up expired token
         raise HTTPException(status_code=404, detail="Link expired or invalid")
     
-    return token_data["data"]
+    return conditional_json_response(
+        request,
+        body=token_data["body"],
+        etag=token_data["etag"],
+        max_age=int(token_data["expiry"] - time.time())
+    )
 
@@ -0,0 +1,205 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# -----------------------------
+# METRIC TYPES
+# -----------------------------
+
+# Latency buckets in seconds (sub-millisecond ranking up to 10 s upstream timeouts)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _label_str(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_label_str(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {k: {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}
+                    for k, s in self._series.items()}
+
+    def quantile(self, series: dict, q: float) -> float:
+        """Estimate a quantile by interpolating inside the matching bucket"""
+        if not series["count"]:
+            return 0.0
+        rank = q * series["count"]
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets + (float("inf"),), series["counts"]):
+            if count and seen + count >= rank:
+                if upper == float("inf"):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return lower
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.snapshot().items()):
+            cumulative = 0
+            for upper, count in zip(self.buckets + (float("inf"),), series["counts"]):
+                cumulative += count
+                le = "+Inf" if upper == float("inf") else repr(upper)
+                labels = _label_str(self.labelnames + ("le",), key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_str(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series['sum']}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+# -----------------------------
+# REGISTRY
+# -----------------------------
+
+REGISTRY = []
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+HTTP_LATENCY = register(Histogram(
+    "sanchar_http_request_duration_seconds",
+    "End-to-end HTTP request latency",
+    ["method", "route", "status"]
+))
+
+STAGE_LATENCY = register(Histogram(
+    "sanchar_stage_duration_seconds",
+    "Time spent in each request stage",
+    ["stage"]
+))
+
+UPSTREAM_LATENCY = register(Histogram(
+    "sanchar_upstream_duration_seconds",
+    "Latency of outbound Groq / Gemini / Nominatim calls",
+    ["provider"]
+))
+
+UPSTREAM_CALLS = register(Counter(
+    "sanchar_upstream_calls_total",
+    "Outbound calls by provider and outcome",
+    ["provider", "outcome"]
+))
+
+UPSTREAM_HEDGES = register(Counter(
+    "sanchar_upstream_hedges_total",
+    "Hedged second attempts fired for slow idempotent upstream calls",
+    ["provider"]
+))
+
+UPSTREAM_COALESCED = register(Counter(
+    "sanchar_upstream_coalesced_total",
+    "Calls answered by joining an identical in-flight upstream request",
+    ["provider"]
+))
+
+RATE_LIMITED = register(Counter(
+    "sanchar_rate_limited_total",
+    "LLM-backed chat turns rejected by the per-session / per-IP token buckets",
+    ["scope"]
+))
+
+RANKING_BATCH_SIZE = register(Histogram(
+    "sanchar_ranking_batch_size",
+    "Ranking requests computed together in one batch",
+    ["mode"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+))
+
+@contextmanager
+def timed(stage: str):
+    """Record how long the wrapped block takes as a request stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage)
+
+def observe_upstream(provider: str, outcome: str, seconds: float):
+    UPSTREAM_LATENCY.observe(seconds, provider=provider)
+    UPSTREAM_CALLS.inc(provider=provider, outcome=outcome)
+
+# -----------------------------
+# EXPOSITION
+# -----------------------------
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def _summarize(histogram: Histogram) -> dict:
+    summary = {}
+    for key, series in sorted(histogram.snapshot().items()):
+        name = "/".join(key)
+        summary[name] = {
+            "count": series["count"],
+            "mean_ms": round(series["sum"] / series["count"] * 1000, 3) if series["count"] else 0.0,
+            "p50_ms": round(histogram.quantile(series, 0.50) * 1000, 3),
+            "p95_ms": round(histogram.quantile(series, 0.95) * 1000, 3),
+            "p99_ms": round(histogram.quantile(series, 0.99) * 1000, 3)
+        }
+    return summary
+
+def stats_summary() -> dict:
+    """Compact per-stage / per-provider view for /system/stats"""
+    upstream = _summarize(UPSTREAM_LATENCY)
+    for (provider, outcome), value in UPSTREAM_CALLS.values().items():
+        upstream.setdefault(provider, {}).setdefault("outcomes", {})[outcome] = int(value)
+    return {
+        "stages": _summarize(STAGE_LATENCY),
+        "upstream": upstream
+    }
@@ -0,0 +1,369 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import observe_upstream, UPSTREAM_HEDGES, UPSTREAM_COALESCED
+from logger import get_logger, fields
+
+log = get_logger("outbound")
+
+# -----------------------------
+# PROVIDER CONFIG
+# -----------------------------
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+# Base URLs are overridable so the callers can be pointed at a local fake server.
+# Timeouts are (connect, read) seconds; hedge_after is when a slow idempotent
+# GET gets a second attempt (0 disables hedging; a hedge also needs a free
+# concurrency slot). At most max_concurrent calls per provider run at once per
+# worker; others queue for up to queue_timeout seconds and are then rejected
+# so the caller falls back.
+PROVIDERS = {
+    "groq": {
+        "base_url": os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1"),
+        "timeout": (2.0, _env_float("GROQ_TIMEOUT_S", 4.0)),
+        "hedge_after": 0.0,
+        "max_concurrent": int(os.getenv("GROQ_MAX_CONCURRENT", "8")),
+        "queue_timeout": _env_float("GROQ_QUEUE_TIMEOUT_S", 0.5)
+    },
+    "gemini": {
+        "base_url": None,  # called through the SDK
+        "timeout": (2.0, _env_float("GEMINI_TIMEOUT_S", 8.0)),
+        "hedge_after": 0.0,
+        "max_concurrent": int(os.getenv("GEMINI_MAX_CONCURRENT", "4")),
+        "queue_timeout": _env_float("GEMINI_QUEUE_TIMEOUT_S", 1.0)
+    },
+    "nominatim": {
+        "base_url": os.getenv("NOMINATIM_BASE_URL", "https://nominatim.openstreetmap.org"),
+        "timeout": (2.0, _env_float("NOMINATIM_TIMEOUT_S", 3.0)),
+        # Off by default: Nominatim's usage policy allows 1 request per second
+        "hedge_after": _env_float("NOMINATIM_HEDGE_AFTER_S", 0.0),
+        "max_concurrent": int(os.getenv("NOMINATIM_MAX_CONCURRENT", "2")),
+        "queue_timeout": _env_float("NOMINATIM_QUEUE_TIMEOUT_S", 1.0)
+    },
+    "open_meteo": {
+        "base_url": os.getenv("OPEN_METEO_BASE_URL", "https://api.open-meteo.com/v1"),
+        "timeout": (2.0, _env_float("OPEN_METEO_TIMEOUT_S", 2.0)),
+        "hedge_after": 0.0,
+        "max_concurrent": int(os.getenv("OPEN_METEO_MAX_CONCURRENT", "4")),
+        "queue_timeout": _env_float("OPEN_METEO_QUEUE_TIMEOUT_S", 0.5)
+    }
+}
+
+# Consecutive failures that open a provider's breaker, and how long it stays open
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = _env_float("BREAKER_RESET_SECONDS", 30.0)
+
+POOL_MAXSIZE = 20
+
+# -----------------------------
+# CIRCUIT BREAKER
+# -----------------------------
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open"""
+
+class UpstreamError(Exception):
+    """Provider answered with a status that counts as a failure (5xx / 429)"""
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures; after `reset_seconds`
+    one probe call is let through (half-open) and its outcome closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.probing or time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self.probing = True
+            return True
+
+    def abandon_probe(self):
+        """Hand back a half-open probe that was granted but never sent"""
+        with self._lock:
+            self.probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                if self.opened_at is None or self.probing:
+                    log.warning("breaker.open", extra=fields(failures=self.failures))
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+BREAKERS = {name: CircuitBreaker() for name in PROVIDERS}
+
+def breaker_states() -> dict:
+    return {name: breaker.state for name, breaker in BREAKERS.items()}
+
+# -----------------------------
+# ADMISSION CONTROL
+# -----------------------------
+
+class AdmissionError(Exception):
+    """Raised when a provider's concurrency limit stayed full for its queue timeout"""
+
+class ConcurrencyLimit:
+    """Semaphore with a bounded wait and in-flight / queued counts for stats"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.queued = 0
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        with self._lock:
+            self.queued += 1
+        acquired = self._slots.acquire(timeout=timeout)
+        with self._lock:
+            self.queued -= 1
+            if acquired:
+                self.in_flight += 1
+        return acquired
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+LIMITS = {name: ConcurrencyLimit(config["max_concurrent"]) for name, config in PROVIDERS.items()}
+
+def admission_states() -> dict:
+    return {
+        name: {"limit": limit.limit, "in_flight": limit.in_flight, "queued": limit.queued}
+        for name, limit in LIMITS.items()
+    }
+
+@contextmanager
+def _admitted(provider: str):
+    """
+    Pass the provider's breaker, then hold one of its concurrency slots.
+
+    The breaker goes first so an open circuit fails fast with
+    CircuitOpenError without queueing for a slot; yields the breaker.
+    """
+    breaker = BREAKERS[provider]
+    if not breaker.allow():
+        observe_upstream(provider, "circuit_open", 0.0)
+        raise CircuitOpenError(provider)
+
+    limit = LIMITS[provider]
+    started = time.perf_counter()
+    if not limit.acquire(PROVIDERS[provider]["queue_timeout"]):
+        breaker.abandon_probe()
+        observe_upstream(provider, "rejected", time.perf_counter() - started)
+        raise AdmissionError(provider)
+    try:
+        yield breaker
+    finally:
+        limit.release()
+
+# -----------------------------
+# POOLED SESSIONS
+# -----------------------------
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="outbound-hedge")
+
+def _session(provider: str) -> requests.Session:
+    """One keep-alive connection pool per provider"""
+    session = _sessions.get(provider)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(provider)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _sessions[provider] = session
+    return session
+
+def _send(provider: str, method: str, url: str, kwargs: dict) -> requests.Response:
+    return _session(provider).request(method, url, timeout=PROVIDERS[provider]["timeout"], **kwargs)
+
+def _send_in_slot(limit: ConcurrencyLimit, provider: str, url: str, kwargs: dict) -> requests.Response:
+    try:
+        return _send(provider, "GET", url, kwargs)
+    finally:
+        limit.release()
+
+def _send_hedged(provider: str, url: str, kwargs: dict, hedge_after: float) -> requests.Response:
+    """
+    GET that fires one extra attempt if the first is still running after
+    hedge_after. The extra attempt holds its own concurrency slot until it
+    finishes and is skipped when none is free.
+    """
+    first = _hedge_pool.submit(_send, provider, "GET", url, kwargs)
+    done, _ = wait([first], timeout=hedge_after)
+    limit = LIMITS[provider]
+    if done or not limit.acquire(0):
+        return first.result()
+
+    UPSTREAM_HEDGES.inc(provider=provider)
+    pending = {first, _hedge_pool.submit(_send_in_slot, limit, provider, url, kwargs)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+    raise error
+
+# -----------------------------
+# CALLS
+# -----------------------------
+
+def _outcome_for(error: Exception) -> str:
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    return "error"
+
+def request(provider: str, method: str, path: str, **kwargs) -> requests.Response:
+    """
+    HTTP call to a provider through its breaker, pool and timeout.
+
+    Returns the response for any status below 500 except 429; raises
+    AdmissionError, CircuitOpenError, UpstreamError or the requests
+    exception otherwise, so callers fall back with a single except.
+    """
+    with _admitted(provider) as breaker:
+        return _request(provider, breaker, method, path, kwargs)
+
+def _request(provider: str, breaker: CircuitBreaker, method: str, path: str,
+             kwargs: dict) -> requests.Response:
+    config = PROVIDERS[provider]
+    url = config["base_url"].rstrip("/") + "/" + path.lstrip("/")
+    started = time.perf_counter()
+    try:
+        if method.upper() == "GET" and config["hedge_after"] > 0:
+            response = _send_hedged(provider, url, kwargs, config["hedge_after"])
+        else:
+            response = _send(provider, method, url, kwargs)
+    except Exception as e:
+        breaker.record_failure()
+        observe_upstream(provider, _outcome_for(e), time.perf_counter() - started)
+        raise
+
+    elapsed = time.perf_counter() - started
+    if response.status_code >= 500 or response.status_code == 429:
+        breaker.record_failure()
+        observe_upstream(provider, f"http_{response.status_code}", elapsed)
+        raise UpstreamError(f"{provider} returned {response.status_code}")
+
+    breaker.record_success()
+    observe_upstream(provider, "ok" if response.status_code < 400 else f"http_{response.status_code}", elapsed)
+    return response
+
+def call(provider: str, fn, *args, **kwargs):
+    """Run an SDK call (e.g. Gemini) through the provider's limit, breaker and metrics"""
+    with _admitted(provider) as breaker:
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            breaker.record_failure()
+            observe_upstream(provider, _outcome_for(e), time.perf_counter() - started)
+            raise
+        breaker.record_success()
+        observe_upstream(provider, "ok", time.perf_counter() - started)
+        return result
+
+def timeout_for(provider: str) -> float:
+    """Total time budget for SDK calls that take a single timeout"""
+    connect, read = PROVIDERS[provider]["timeout"]
+    return connect + read
+
+# -----------------------------
+# REQUEST COALESCING
+# -----------------------------
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one execution: the first caller
+    runs fn, the rest wait for its result (or exception). Nothing is cached
+    once the call finishes.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn(*args, **kwargs)
+            return flight.result, False
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+FLIGHTS = {name: SingleFlight() for name in PROVIDERS}
+
+def coalesce(provider: str, prompt: str, fn, *args, **kwargs):
+    """Run fn once for all concurrent callers sending the same prompt to a provider"""
+    key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+    result, shared = FLIGHTS[provider].do(key, fn, *args, **kwargs)
+    if shared:
+        UPSTREAM_COALESCED.inc(provider=provider)
+    return result
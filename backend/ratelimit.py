@@ -0,0 +1,133 @@
+import ipaddress
+import os
+import threading
+import time
+from collections import OrderedDict
+from metrics import RATE_LIMITED
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+
+# LLM-backed chat turns: a sustained rate (per second, 0 disables) and a burst, per key
+LLM_SESSION_RATE = float(os.getenv("SANCHAR_LLM_SESSION_RATE", "0.2"))
+LLM_SESSION_BURST = int(os.getenv("SANCHAR_LLM_SESSION_BURST", "5"))
+LLM_IP_RATE = float(os.getenv("SANCHAR_LLM_IP_RATE", "1.0"))
+LLM_IP_BURST = int(os.getenv("SANCHAR_LLM_IP_BURST", "20"))
+
+# Buckets kept per limiter; the least recently used key is forgotten first
+MAX_TRACKED_KEYS = 10_000
+
+# Peers whose X-Forwarded-For is believed (comma-separated IPs / CIDRs). Loopback
+# covers a local ngrok agent or reverse proxy; without it every user behind the
+# proxy would share one per-IP bucket.
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.getenv("SANCHAR_TRUSTED_PROXIES", "127.0.0.1/32,::1/128").split(",")
+    if entry.strip()
+]
+
+# -----------------------------
+# TOKEN BUCKETS
+# -----------------------------
+
+class TokenBucket:
+    """Refills at `rate` tokens per second up to `burst`; starts full"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Spend one token; 0.0 on success, otherwise seconds until one is available"""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        self.tokens = min(self.burst, self.tokens + 1)
+
+class RateLimiter:
+    """One token bucket per key (session id, client IP), LRU-bounded"""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = MAX_TRACKED_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def take(self, key: str) -> float:
+        with self._lock:
+            return self._bucket(key).take()
+
+    def refund(self, key: str):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.refund()
+
+# -----------------------------
+# CLIENT ADDRESS
+# -----------------------------
+
+def _trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+def client_address(peer: str, forwarded_for: str = "") -> str:
+    """
+    The client's IP: the peer itself, unless the peer is a trusted proxy; then
+    the right-most X-Forwarded-For hop that isn't one (left-most entries are
+    client-supplied and can be forged).
+    """
+    if not forwarded_for or not _trusted(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop):
+            return hop
+    return hops[0] if hops else peer
+
+LLM_LIMITERS = {
+    "session": RateLimiter(LLM_SESSION_RATE, LLM_SESSION_BURST),
+    "ip": RateLimiter(LLM_IP_RATE, LLM_IP_BURST)
+}
+
+def admit_llm_turn(session_id: str, client_ip: str) -> float:
+    """
+    Charge one LLM-backed turn to both the session and the client IP.
+
+    Returns 0.0 when admitted, otherwise the Retry-After seconds; a turn
+    rejected by the IP limit gives the session back its token.
+    """
+    retry_after = LLM_LIMITERS["session"].take(session_id)
+    if retry_after > 0:
+        RATE_LIMITED.inc(scope="session")
+        return retry_after
+    retry_after = LLM_LIMITERS["ip"].take(client_ip)
+    if retry_after > 0:
+        LLM_LIMITERS["session"].refund(session_id)
+        RATE_LIMITED.inc(scope="ip")
+    return retry_after
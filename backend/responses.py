@@ -0,0 +1,95 @@
+import hashlib
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+# -----------------------------
+# FAST JSON RESPONSES
+# -----------------------------
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(obj):
+    """Fallback for types orjson doesn't know (NumPy scalars, pydantic models)"""
+    if hasattr(obj, "item"):
+        return obj.item()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+class FastJSONResponse(Response):
+    """
+    orjson-rendered JSON response. Returning one directly from an endpoint
+    also skips FastAPI's jsonable_encoder pass over the payload.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+# -----------------------------
+# PRECOMPUTED FRAGMENTS
+# -----------------------------
+
+def object_prefix(static_fields: dict) -> bytes:
+    """Serialized object minus its closing brace, to be finished per request"""
+    return dumps(static_fields)[:-1]
+
+def finish_object(prefix: bytes, **dynamic_fields) -> orjson.Fragment:
+    """Append per-request fields to a precomputed prefix without re-encoding it"""
+    if not dynamic_fields:
+        return orjson.Fragment(prefix + b"}")
+    tail = dumps(dynamic_fields)[1:]
+    separator = b"," if len(prefix) > 1 else b""
+    return orjson.Fragment(prefix + separator + tail)
+
+# -----------------------------
+# CONDITIONAL GET
+# -----------------------------
+
+def etag_for(body: bytes) -> str:
+    # Weak, because compression middleware may re-encode the same entity
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def serialize_with_etag(content) -> tuple:
+    body = dumps(content)
+    return body, etag_for(body)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def conditional_json_response(request: Request, content=None, body: bytes = None,
+                              etag: str = None, max_age: int = 0) -> Response:
+    """
+    JSON response with an ETag; answers 304 with no body when the client
+    already holds the same representation. Pass body/etag when they were
+    precomputed for immutable payloads.
+    """
+    if body is None:
+        body, etag = serialize_with_etag(content)
+    elif etag is None:
+        etag = etag_for(body)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,15 +1,59 @@
-from fastapi import APIRouter
+import os
+from functools import lru_cache
+from typing import Optional
+import numpy as np
+from fastapi import APIRouter, HTTPException, Request
 from helpers import (
+    PLACES_CSV_PATH,
     load_places_data,
-    haversine,
+    haversine_vector,
     geocode_place,
     is_valid_hidden_gem,
     hidden_gem_rank,
     is_sanchar_hidden_gem
 )
+from responses import FastJSONResponse, object_prefix, finish_object, conditional_json_response
+from enhanced_pipeline import enhanced_pipeline
+import tiles
 
 router = APIRouter(prefix="/places", tags=["Places"])
 
+# Fields returned per hidden gem (plus distance_km / hidden_rank)
+HIDDEN_GEM_FIELDS = [
+    "place_id", "place_name", "category", "area", "latitude", "longitude",
+    "famous_for", "budget_min", "budget_max", "open_time", "close_time"
+]
+
+@lru_cache(maxsize=1)
+def hidden_gem_index(catalog_mtime: float) -> dict:
+    """
+    Hidden gems as coordinate/rank arrays plus a pre-serialized JSON
+    prefix per place. Rebuilt only when the CSV changes on disk.
+    """
+    lats, lons, ranks, prefixes = [], [], [], []
+    for p in load_places_data():
+        if not is_sanchar_hidden_gem(p):
+            continue
+
+        try:
+            lat, lon = float(p["latitude"]), float(p["longitude"])
+        except:
+            continue
+
+        lats.append(lat)
+        lons.append(lon)
+        ranks.append(hidden_gem_rank(p))
+        static = {f: p.get(f) for f in HIDDEN_GEM_FIELDS}
+        static["latitude"], static["longitude"] = lat, lon
+        prefixes.append(object_prefix(static))
+
+    return {
+        "lat": np.array(lats, dtype=float),
+        "lon": np.array(lons, dtype=float),
+        "rank": np.array(ranks, dtype=float),
+        "prefix": prefixes
+    }
+
 @router.post("/hidden/explore")
 def explore_hidden_gems(payload: dict):
     preferred_location = payload.get("preferred_location")
@@ -20,40 +64,56 @@ def explore_hidden_gems(payload: dict):
     if lat is None:
         return []
 
-    places = load_places_data()
+    gems = hidden_gem_index(os.path.getmtime(PLACES_CSV_PATH))
+    distances = haversine_vector(lat, lon, gems["lat"], gems["lon"])
 
     def find_within(radius_km):
-        results = []
-        for p in places:
-            if not is_sanchar_hidden_gem(p):
-                continue
-
-            try:
-                dist = haversine(
-                    lat,
-                    lon,
-                    float(p["latitude"]),
-                    float(p["longitude"])
-                )
-            except:
-                continue
-
-            if dist > radius_km:
-                continue
-
-            item = dict(p)
-            item["distance_km"] = round(dist, 2)
-            item["hidden_rank"] = hidden_gem_rank(p)
-            results.append(item)
-
-        results.sort(key=lambda x: (-x["hidden_rank"], x["distance_km"]))
-        return results
+        within = np.flatnonzero(distances <= radius_km)
+        # Best rank first, nearest first among equal ranks
+        return within[np.lexsort((distances[within], -gems["rank"][within]))]
 
     # 🔍 Pass 1: nearby
     results = find_within(5)
 
     # 🔁 Pass 2: expand search if empty
-    if not results:
+    if results.size == 0:
         results = find_within(20)
 
-    return results[:5]
+    return FastJSONResponse([
+        finish_object(
+            gems["prefix"][i],
+            distance_km=round(float(distances[i]), 2),
+            hidden_rank=float(gems["rank"][i])
+        )
+        for i in results[:5]
+    ])
+
+MAX_CHEAPEST_RESULTS = 50
+
+@router.get("/cheapest")
+def cheapest_nearby(lat: float, lon: float, radius_km: float = 5.0,
+                    min_cost: float = 0, max_cost: Optional[float] = None, limit: int = 10):
+    """Places near a point within a rupee range, cheapest first"""
+    if not enhanced_pipeline.ready:
+        return FastJSONResponse({"status": "starting"}, status_code=503)
+    return FastJSONResponse(enhanced_pipeline.cheapest_nearby(
+        lat, lon,
+        radius_km=max(0.1, min(radius_km, 50.0)),
+        min_cost=min_cost,
+        max_cost=np.inf if max_cost is None else max_cost,
+        limit=max(1, min(limit, MAX_CHEAPEST_RESULTS))
+    ))
+
+@router.get("/tiles/{z}/{x}/{y}")
+def get_place_tile(z: int, x: int, y: int, request: Request):
+    """
+    Places in one Web Mercator (slippy map) tile. Low zooms and dense
+    tiles return clusters (centroid + count) instead of individual places.
+    """
+    if not tiles.valid_tile(z, x, y):
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    if not enhanced_pipeline.ready:
+        return FastJSONResponse({"status": "starting"}, status_code=503)
+
+    body, etag = tiles.tile_body(enhanced_pipeline, z, x, y)
+    return conditional_json_response(request, body=body, etag=etag, max_age=tiles.TILE_MAX_AGE)
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from models.plan import HangoutPlan
 from store import save_plan, get_plan_by_share_code
+from responses import serialize_with_etag, conditional_json_response
+from cache import TTLCache
 import random
 import string
 
 router = APIRouter()
 
+SHARED_PLAN_MAX_AGE = 3600
+SHARED_PLAN_CACHE_MAX_ENTRIES = 1024
+
+# Serialized shared plans; dropped whenever their share code is written
+SHARED_PLAN_BODIES = TTLCache(SHARED_PLAN_CACHE_MAX_ENTRIES, SHARED_PLAN_MAX_AGE)
+
 def generate_share_code():
     return "".join(
         random.choices(string.ascii_uppercase + string.digits, k=6)
@@ -24,6 +32,7 @@ def create_plan(payload: dict):
     )
 
     save_plan(plan)
+    SHARED_PLAN_BODIES.delete(share_code)
 
     return {
         "shareCode": share_code,
@@ -31,8 +40,14 @@ def create_plan(payload: dict):
     }
 
 @router.get("/plans/share/{share_code}")
-def get_shared_plan(share_code: str):
-    plan = get_plan_by_share_code(share_code)
-    if not plan:
-        raise HTTPException(status_code=404, detail="Plan not found")
-    return plan
+def get_shared_plan(share_code: str, request: Request):
+    cached = SHARED_PLAN_BODIES.get(share_code)
+    if cached is None:
+        plan = get_plan_by_share_code(share_code)
+        if not plan:
+            raise HTTPException(status_code=404, detail="Plan not found")
+        cached = serialize_with_etag(plan)
+        SHARED_PLAN_BODIES.set(share_code, cached)
+
+    body, etag = cached
+    return conditional_json_response(request, body=body, etag=etag, max_age=SHARED_PLAN_MAX_AGE)
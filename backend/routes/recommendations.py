@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional
+from enhanced_pipeline import enhanced_pipeline
+from responses import FastJSONResponse
+
+router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
+
+MAX_BATCH_PROFILES = 1000
+
+class RecommendationProfile(BaseModel):
+    lat: float
+    lon: float
+    mood: str = "chill"
+    budget: str = "medium"
+    time: str = "2-4"
+    radius_km: Optional[float] = None
+
+class BatchRecommendationRequest(BaseModel):
+    profiles: List[RecommendationProfile]
+    max_places: int = 5
+
+@router.post("/batch")
+def batch_recommendations(req: BatchRecommendationRequest):
+    """Pre-generate recommendations for many locations in one call"""
+    if len(req.profiles) > MAX_BATCH_PROFILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BATCH_PROFILES} profiles per batch"
+        )
+    if not enhanced_pipeline.ready:
+        return FastJSONResponse({"status": "starting"}, status_code=503)
+
+    user_profiles = []
+    for p in req.profiles:
+        user_profile = enhanced_pipeline.create_user_profile_json(
+            mood=p.mood,
+            budget=p.budget,
+            time=p.time,
+            lat=p.lat,
+            lon=p.lon,
+            use_current_location=True
+        )
+        if p.radius_km is not None:
+            user_profile["location"]["search_radius_km"] = max(1.0, min(p.radius_km, 50.0))
+        user_profile["constraints"]["max_places"] = max(1, min(req.max_places, 20))
+        user_profiles.append(user_profile)
+
+    results = enhanced_pipeline.generate_batch_recommendations(user_profiles)
+
+    return {
+        "results": [
+            {
+                "optimized_plan": r["recommendations"],
+                "search_info": {
+                    "radius_used": r["search_radius_used"],
+                    "total_found": r["total_places_found"]
+                }
+            }
+            for r in results
+        ]
+    }
@@ -1,7 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 from typing import List
-from store import add_availability, best_time_slot, get_schedule
+from store import (
+    add_availability,
+    replace_availability,
+    best_time_slot,
+    best_time_slots,
+    top_time_slots,
+    common_time_windows,
+    get_schedule,
+    get_session
+)
+from scheduling import format_minutes
+from enhanced_pipeline import enhanced_pipeline
+from responses import conditional_json_response
 
 router = APIRouter(prefix="/schedule", tags=["Schedule"])
 
@@ -9,18 +21,47 @@ class AvailabilityRequest(BaseModel):
     session_id: str
     user: str
     slots: List[str]
+    replace: bool = False  # True when a user edits their earlier submission
+
+def describe_windows(session_id: str) -> dict:
+    """Best overlapping time windows, each checked against the plan's opening hours"""
+    count, windows = common_time_windows(session_id)
+
+    state = get_session(session_id) or {}
+    plan_ids = [p["place_id"] for p in state.get("current_recommendations", [])]
+
+    described = []
+    for w in windows:
+        item = {
+            "start": format_minutes(w["start"]),
+            "end": format_minutes(w["end"]),
+            "users": w["users"]
+        }
+        if plan_ids:
+            item["open_places"] = enhanced_pipeline.places_open_during(plan_ids, w["start"], w["end"])
+        described.append(item)
+
+    return {"users": count, "windows": described}
 
 @router.post("/availability")
 def submit_availability(req: AvailabilityRequest):
-    add_availability(req.session_id, req.user, req.slots)
+    if req.replace:
+        replace_availability(req.session_id, req.user, req.slots)
+    else:
+        add_availability(req.session_id, req.user, req.slots)
     return {
         "status": "ok",
-        "best_slot": best_time_slot(req.session_id)
+        "best_slot": best_time_slot(req.session_id),
+        "best_windows": describe_windows(req.session_id)
     }
 
 @router.get("/{session_id}")
-def view_schedule(session_id: str):
-    return {
+def view_schedule(session_id: str, request: Request):
+    # Polled by every participant; unchanged schedules answer 304
+    return conditional_json_response(request, {
         "slots": get_schedule(session_id),
-        "best_slot": best_time_slot(session_id)
-    }
+        "best_slot": best_time_slot(session_id),
+        "tied_slots": best_time_slots(session_id),
+        "top_slots": top_time_slots(session_id),
+        "best_windows": describe_windows(session_id)
+    })
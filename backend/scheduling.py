@@ -0,0 +1,144 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# -------------------------
+# TIME SLOT PARSING
+# -------------------------
+MINUTES_PER_DAY = 24 * 60
+
+SLOT_PATTERN = re.compile(
+    r"^\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*(?:-|–|to)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*$",
+    re.IGNORECASE
+)
+
+def _to_minutes(hour: int, minute: int, meridiem: Optional[str]) -> int:
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    return hour * 60 + minute
+
+def parse_slot(slot: str) -> Optional[Tuple[int, int]]:
+    """
+    "6-8pm", "6pm-8pm", "10:30am - 1pm", "18:00-20:00", "11pm-1am"
+    -> (start, end) minutes since midnight. Ranges past midnight get
+    end > 1440. Returns None for slots that aren't a time range.
+    """
+    match = SLOT_PATTERN.match(slot or "")
+    if not match:
+        return None
+
+    h1, m1, mer1, h2, m2, mer2 = match.groups()
+    h1, h2 = int(h1), int(h2)
+    m1, m2 = int(m1 or 0), int(m2 or 0)
+    mer1 = mer1.lower() if mer1 else None
+    mer2 = mer2.lower() if mer2 else None
+
+    if (mer1 or mer2) and (h1 > 12 or h2 > 12):
+        return None
+    if h1 > 24 or h2 > 24 or m1 > 59 or m2 > 59:
+        return None
+
+    # "6-8pm": the start borrows the end's am/pm, unless that would put it
+    # after the end ("11-1pm" is 11am-1pm)
+    if mer2 and not mer1:
+        mer1 = mer2
+        if _to_minutes(h1, m1, mer1) > _to_minutes(h2, m2, mer2) and mer2 == "pm":
+            mer1 = "am"
+
+    start = _to_minutes(h1, m1, mer1)
+    end = _to_minutes(h2, m2, mer2)
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+def format_minutes(minutes: int) -> str:
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+# -------------------------
+# SWEEP-LINE OVERLAP
+# -------------------------
+def _merge(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Union of one user's intervals on the 24h clock, so overlapping picks count once.
+
+    Ranges past midnight are split into [start, 1440) and [0, end - 1440),
+    so "11pm-1am" overlaps "12-1am".
+    """
+    pieces = []
+    for start, end in intervals:
+        if end - start >= MINUTES_PER_DAY:
+            pieces.append((0, MINUTES_PER_DAY))
+            continue
+        start, end = start % MINUTES_PER_DAY, start % MINUTES_PER_DAY + end - start
+        if end > MINUTES_PER_DAY:
+            pieces.append((start, MINUTES_PER_DAY))
+            pieces.append((0, end - MINUTES_PER_DAY))
+        else:
+            pieces.append((start, end))
+
+    merged = []
+    for start, end in sorted(pieces):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def best_windows(user_intervals: Dict[str, List[Tuple[int, int]]]) -> Tuple[int, List[Dict]]:
+    """
+    Maximal windows covered by the most users, in O(n log n).
+
+    Returns (max_count, windows) with each window as
+    {"start", "end", "users"} in minutes since midnight; a window across
+    midnight has end > 1440, as parse_slot does.
+    """
+    events = []
+    for user, intervals in user_intervals.items():
+        for start, end in _merge(intervals):
+            events.append((start, 1, user))
+            events.append((end, -1, user))
+    if not events:
+        return 0, []
+
+    # Ends sort before starts at the same instant: intervals are half-open
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    # First pass counts only; users are listed for the winning spans alone
+    spans = []
+    best, count = 0, 0
+    i = 0
+    while i < len(events):
+        t = events[i][0]
+        while i < len(events) and events[i][0] == t:
+            count += events[i][1]
+            i += 1
+        if i == len(events) or count == 0 or count < best:
+            continue
+        if count > best:
+            best, spans = count, []
+        spans.append((t, events[i][0]))
+
+    # Second pass: who is active in each winning span
+    windows = []
+    active = {}
+    i = 0
+    for start, end in spans:
+        while i < len(events) and events[i][0] <= start:
+            _, delta, user = events[i]
+            if delta > 0:
+                active[user] = None
+            else:
+                del active[user]
+            i += 1
+        users = list(active)
+        if windows and windows[-1]["end"] == start and windows[-1]["users"] == users:
+            windows[-1]["end"] = end
+        else:
+            windows.append({"start": start, "end": end, "users": users})
+
+    # The same users on both sides of midnight: one window
+    if len(windows) > 1 and windows[0]["start"] == 0 and windows[-1]["end"] == MINUTES_PER_DAY \
+            and set(windows[0]["users"]) == set(windows[-1]["users"]):
+        first = windows.pop(0)
+        windows[-1]["end"] = MINUTES_PER_DAY + first["end"]
+
+    return best, windows
@@ -1,6 +1,8 @@
+import threading
 from typing import Dict
 from uuid import uuid4
 from models.plan import HangoutPlan
+from scheduling import parse_slot, best_windows
 
 # -----------------------------
 # SESSION STORE (UNCHANGED LOGIC)
@@ -36,23 +38,153 @@ def get_plan_by_share_code(share_code: str):
 # SCHEDULE STORE
 # -----------------------------
 
-SCHEDULE_STORE = {}
+class SlotBoard:
+    """
+    Availability for one group poll.
+
+    Users per slot are kept as insertion-ordered sets, and slots are
+    bucketed by how many users picked them, so the best slot is O(1) and
+    each add/remove is O(1). Among tied slots, the one that reached the
+    count first wins.
+
+    Slots that parse as time ranges ("6-8pm") also feed an interval
+    sweep, so overlapping ranges from different users are found too.
+    """
+
+    def __init__(self):
+        self.slot_users = {}   # slot -> {user: None}
+        self.user_slots = {}   # user -> {slot: None}
+        self.buckets = {}      # count -> {slot: None}
+        self.max_count = 0
+        self.intervals = {}    # slot -> (start, end) minutes, or None
+        self.version = 0
+        self._windows = (-1, 0, [])
+        self.lock = threading.Lock()
+
+    def _move(self, slot, old_count, new_count):
+        if old_count:
+            bucket = self.buckets[old_count]
+            del bucket[slot]
+            if not bucket:
+                del self.buckets[old_count]
+        if new_count:
+            self.buckets.setdefault(new_count, {})[slot] = None
+        if new_count > self.max_count:
+            self.max_count = new_count
+        while self.max_count and self.max_count not in self.buckets:
+            self.max_count -= 1
+
+    def add(self, user, slot):
+        users = self.slot_users.setdefault(slot, {})
+        if user in users:
+            return
+        users[user] = None
+        self.user_slots.setdefault(user, {})[slot] = None
+        if slot not in self.intervals:
+            self.intervals[slot] = parse_slot(slot)
+        self._move(slot, len(users) - 1, len(users))
+        self.version += 1
+
+    def remove(self, user, slot):
+        users = self.slot_users.get(slot)
+        if not users or user not in users:
+            return
+        del users[user]
+        del self.user_slots[user][slot]
+        self._move(slot, len(users) + 1, len(users))
+        self.version += 1
+
+    def best(self):
+        if not self.max_count:
+            return None
+        return next(iter(self.buckets[self.max_count]))
+
+    def best_slots(self) -> list:
+        """Every slot tied for the highest count"""
+        if not self.max_count:
+            return []
+        return list(self.buckets[self.max_count])
+
+    def top(self, n: int) -> list:
+        """Up to n (slot, count) pairs, highest count first"""
+        result = []
+        count = self.max_count
+        while count and len(result) < n:
+            for slot in self.buckets.get(count, ()):
+                result.append((slot, count))
+                if len(result) == n:
+                    break
+            count -= 1
+        return result
+
+    def common_windows(self) -> tuple:
+        """(max users, maximal windows) over parsed time ranges; cached per version"""
+        if self._windows[0] != self.version:
+            user_intervals = {
+                user: [self.intervals[s] for s in slots if self.intervals.get(s)]
+                for user, slots in self.user_slots.items()
+            }
+            self._windows = (self.version, *best_windows(user_intervals))
+        return self._windows[1], self._windows[2]
+
+    def as_dict(self) -> dict:
+        return {"slots": {slot: list(users) for slot, users in self.slot_users.items() if users}}
+
+SCHEDULE_STORE: Dict[str, SlotBoard] = {}
+
+def _board(session_id: str) -> SlotBoard:
+    board = SCHEDULE_STORE.get(session_id)
+    if board is None:
+        board = SCHEDULE_STORE.setdefault(session_id, SlotBoard())
+    return board
 
 def add_availability(session_id: str, user: str, slots: list):
-    if session_id not in SCHEDULE_STORE:
-        SCHEDULE_STORE[session_id] = {"slots": {}}
-
-    for slot in slots:
-        SCHEDULE_STORE[session_id]["slots"].setdefault(slot, [])
-        if user not in SCHEDULE_STORE[session_id]["slots"][slot]:
-            SCHEDULE_STORE[session_id]["slots"][slot].append(user)
+    board = _board(session_id)
+    with board.lock:
+        for slot in slots:
+            board.add(user, slot)
+
+def replace_availability(session_id: str, user: str, slots: list):
+    """Set a user's slots to exactly `slots` (for edited submissions)"""
+    board = _board(session_id)
+    with board.lock:
+        for slot in list(board.user_slots.get(user, ())):
+            if slot not in slots:
+                board.remove(user, slot)
+        for slot in slots:
+            board.add(user, slot)
 
 def get_schedule(session_id: str):
-    return SCHEDULE_STORE.get(session_id, {"slots": {}})
+    board = SCHEDULE_STORE.get(session_id)
+    if board is None:
+        return {"slots": {}}
+    with board.lock:
+        return board.as_dict()
 
 def best_time_slot(session_id: str):
-    data = get_schedule(session_id)["slots"]
-    if not data:
+    board = SCHEDULE_STORE.get(session_id)
+    if board is None:
         return None
-
-    return max(data.items(), key=lambda x: len(x[1]))[0]
+    with board.lock:
+        return board.best()
+
+def best_time_slots(session_id: str) -> list:
+    board = SCHEDULE_STORE.get(session_id)
+    if board is None:
+        return []
+    with board.lock:
+        return board.best_slots()
+
+def common_time_windows(session_id: str) -> tuple:
+    board = SCHEDULE_STORE.get(session_id)
+    if board is None:
+        return 0, []
+    with board.lock:
+        return board.common_windows()
+
+def top_time_slots(session_id: str, n: int = 3) -> list:
+    board = SCHEDULE_STORE.get(session_id)
+    if board is None:
+        return []
+    with board.lock:
+        return [{"slot": slot, "count": count} for slot, count in board.top(n)]
@@ -0,0 +1,71 @@
+"""
+Catalog segment publishing: published versions are never rewritten, and old
+versions are pruned only once no pipeline has them attached. Run from backend/:
+
+    python -m pytest tests
+"""
+import os
+import threading
+import pandas as pd
+import pytest
+import catalog_store
+from enhanced_pipeline import EnhancedRAGPipeline
+from helpers import PLACES_CSV_PATH
+from ingest import build_catalog
+
+pytestmark = pytest.mark.skipif(catalog_store.fcntl is None, reason="segment pinning needs fcntl")
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "places.csv"
+    pd.read_csv(PLACES_CSV_PATH, dtype=str).to_csv(path, index=False)
+    return str(path)
+
+def _attach(directory: str) -> EnhancedRAGPipeline:
+    pipeline = EnhancedRAGPipeline(autoload=False)
+    pipeline._attach_segment(directory, catalog_store.read_manifest(directory))
+    return pipeline
+
+def test_rebuilding_unchanged_data_keeps_mapped_files(source, tmp_path):
+    directory = str(tmp_path / "catalog")
+    version = build_catalog([source], directory)["version"]
+    pipeline = _attach(directory)
+    mapped = os.path.join(directory, version, "latitude.npy")
+    inode = os.stat(mapped).st_ino
+    expected = float(pipeline.lat_arr.sum())
+
+    # Reads keep going through every rebuild; a truncated mapping would SIGBUS here
+    stop = threading.Event()
+    sums = []
+
+    def read():
+        while not stop.is_set():
+            sums.append(float(pipeline.lat_arr.sum()) + len(pipeline.strings["place_name"][:]))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for _ in range(5):
+            os.utime(source)  # newer mtime, same content
+            assert build_catalog([source], directory)["version"] == version
+    finally:
+        stop.set()
+        reader.join()
+
+    assert os.stat(mapped).st_ino == inode
+    assert sums and float(pipeline.lat_arr.sum()) == expected
+
+def test_old_versions_are_pruned_once_unpinned(source, tmp_path):
+    directory = str(tmp_path / "catalog")
+    old = build_catalog([source], directory)["version"]
+    pipeline = _attach(directory)
+
+    pd.read_csv(source, dtype=str).iloc[:-1].to_csv(source, index=False)
+    new = build_catalog([source], directory)["version"]
+    assert new != old
+    assert os.path.isdir(os.path.join(directory, old))  # still attached
+
+    pipeline._attach_segment(directory, catalog_store.read_manifest(directory))
+    build_catalog([source], directory)
+    assert not os.path.exists(os.path.join(directory, old))
+    assert os.path.isdir(os.path.join(directory, new))
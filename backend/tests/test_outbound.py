@@ -0,0 +1,108 @@
+"""
+Outbound layer against a local fake HTTP server: breaker open / close and
+request hedging. Run from backend/:
+
+    python -m pytest tests
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import outbound
+from metrics import UPSTREAM_HEDGES
+
+class FakeUpstream(ThreadingHTTPServer):
+    """Answers every GET with `status`; the first `slow_requests` sleep `delay` seconds first"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.status = 200
+        self.delay = 0.0
+        self.slow_requests = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server._lock:
+            server.hits += 1
+            slow = server.hits <= server.slow_requests
+        if slow:
+            time.sleep(server.delay)
+        body = b'{"ok": true}'
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def upstream(monkeypatch):
+    server = FakeUpstream()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setitem(outbound.PROVIDERS["nominatim"], "base_url", server.url)
+    monkeypatch.setitem(outbound.PROVIDERS["nominatim"], "hedge_after", 0.0)
+    monkeypatch.setitem(outbound.BREAKERS, "nominatim", outbound.CircuitBreaker(threshold=2, reset_seconds=0.2))
+    monkeypatch.setitem(outbound.LIMITS, "nominatim", outbound.ConcurrencyLimit(2))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _hedges() -> float:
+    return UPSTREAM_HEDGES.values().get(("nominatim",), 0.0)
+
+def test_breaker_opens_after_failures_and_closes_after_probe(upstream):
+    breaker = outbound.BREAKERS["nominatim"]
+    upstream.status = 503
+    for _ in range(2):
+        with pytest.raises(outbound.UpstreamError):
+            outbound.request("nominatim", "GET", "/search")
+    assert breaker.state == "open"
+
+    # Open: fails fast without reaching the server
+    with pytest.raises(outbound.CircuitOpenError):
+        outbound.request("nominatim", "GET", "/search")
+    assert upstream.hits == 2
+
+    time.sleep(0.25)
+    assert breaker.state == "half_open"
+    upstream.status = 200
+    assert outbound.request("nominatim", "GET", "/search").json() == {"ok": True}
+    assert breaker.state == "closed"
+    assert upstream.hits == 3
+
+def test_slow_get_is_hedged(upstream, monkeypatch):
+    monkeypatch.setitem(outbound.PROVIDERS["nominatim"], "hedge_after", 0.05)
+    upstream.delay = 1.0
+    upstream.slow_requests = 1
+    hedges = _hedges()
+
+    started = time.perf_counter()
+    response = outbound.request("nominatim", "GET", "/search")
+    assert response.status_code == 200
+    assert time.perf_counter() - started < 0.5  # answered by the hedge, not the slow first attempt
+    assert _hedges() == hedges + 1
+    assert upstream.hits == 2
+
+def test_hedge_skipped_without_a_free_slot(upstream, monkeypatch):
+    monkeypatch.setitem(outbound.PROVIDERS["nominatim"], "hedge_after", 0.05)
+    monkeypatch.setitem(outbound.LIMITS, "nominatim", outbound.ConcurrencyLimit(1))
+    upstream.delay = 0.3
+    upstream.slow_requests = 1
+    hedges = _hedges()
+
+    assert outbound.request("nominatim", "GET", "/search").status_code == 200
+    assert _hedges() == hedges
+    assert upstream.hits == 1
+    assert outbound.LIMITS["nominatim"].in_flight == 0
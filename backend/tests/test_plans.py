@@ -0,0 +1,34 @@
+"""
+Shared-plan bodies are cached, bounded and dropped when their share code is
+written again. Run from backend/:
+
+    python -m pytest tests
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routes import plans
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(plans, "SHARED_PLAN_BODIES", plans.TTLCache(2, plans.SHARED_PLAN_MAX_AGE))
+    app = FastAPI()
+    app.include_router(plans.router)
+    return TestClient(app)
+
+def _create(client, title):
+    return client.post("/plans", json={"title": title, "mood": "chill", "budget": "low", "places": []})
+
+def test_share_code_collision_serves_the_new_plan(client, monkeypatch):
+    monkeypatch.setattr(plans, "generate_share_code", lambda: "ABC123")
+    _create(client, "first")
+    assert client.get("/plans/share/ABC123").json()["title"] == "first"
+
+    _create(client, "second")
+    assert client.get("/plans/share/ABC123").json()["title"] == "second"
+
+def test_cached_bodies_are_bounded(client):
+    codes = [_create(client, f"plan {i}").json()["shareCode"] for i in range(5)]
+    for code in codes:
+        assert client.get(f"/plans/share/{code}").status_code == 200
+    assert plans.SHARED_PLAN_BODIES.stats()["entries"] == 2
@@ -0,0 +1,18 @@
+"""
+Client addresses for the per-IP LLM limit. Run from backend/:
+
+    python -m pytest tests
+"""
+from ratelimit import client_address
+
+def test_forwarded_for_is_used_only_behind_a_trusted_proxy():
+    # Local proxy (ngrok agent, nginx): each user gets their own address
+    assert client_address("127.0.0.1", "203.0.113.7") == "203.0.113.7"
+    assert client_address("127.0.0.1", "203.0.113.8") == "203.0.113.8"
+    # Untrusted peers can't pick their bucket with a forged header
+    assert client_address("198.51.100.1", "203.0.113.7") == "198.51.100.1"
+    assert client_address("127.0.0.1", "") == "127.0.0.1"
+
+def test_forged_left_most_hops_are_ignored():
+    assert client_address("127.0.0.1", "10.0.0.1, 203.0.113.7") == "203.0.113.7"
+    assert client_address("127.0.0.1", "203.0.113.7, 127.0.0.1") == "203.0.113.7"
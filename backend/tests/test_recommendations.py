@@ -0,0 +1,37 @@
+"""
+Batch recommendations agree with generate_recommendations. Run from backend/:
+
+    python -m pytest tests
+"""
+import copy
+import random
+import pytest
+from enhanced_pipeline import EnhancedRAGPipeline, parse_rupee_range
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return EnhancedRAGPipeline()
+
+@pytest.mark.parametrize("budget", ["200-500", "under 100"])
+def test_batch_matches_generate_recommendations_for_rupee_budgets(pipeline, budget):
+    rng = random.Random(7)
+    profiles = [
+        pipeline.create_user_profile_json(
+            mood=rng.choice(["chill", "fun", "romantic"]), budget=budget, time="2-4",
+            lat=12.97 + rng.uniform(-0.1, 0.1), lon=77.59 + rng.uniform(-0.1, 0.1),
+            use_current_location=True
+        )
+        for _ in range(50)
+    ]
+    batch = pipeline.generate_batch_recommendations(copy.deepcopy(profiles))
+
+    low, high = parse_rupee_range(budget)
+    for profile, batched in zip(profiles, batch):
+        pipeline.result_cache.clear()
+        single = pipeline.generate_recommendations(copy.deepcopy(profile))
+        assert [r["place_id"] for r in batched["recommendations"]] == \
+               [r["place_id"] for r in single["recommendations"]]
+        assert batched["total_places_found"] == single["total_places_found"]
+        for place in batched["recommendations"]:
+            place_min, place_max = (float(v) for v in place["budget_range"].lstrip("₹").split("-"))
+            assert place_max >= low and place_min <= high
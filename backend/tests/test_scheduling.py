@@ -0,0 +1,27 @@
+"""
+Best common time windows across users' availability. Run from backend/:
+
+    python -m pytest tests
+"""
+from scheduling import best_windows, parse_slot
+
+def _windows(slots):
+    return best_windows({user: [parse_slot(s) for s in picks] for user, picks in slots.items()})
+
+def test_ranges_past_midnight_overlap_early_morning_slots():
+    count, windows = _windows({"asha": ["11pm-1am"], "ravi": ["12-1am"]})
+    assert count == 2
+    assert [(w["start"], w["end"], sorted(w["users"])) for w in windows] == [(0, 60, ["asha", "ravi"])]
+
+def test_window_across_midnight_is_one_window():
+    count, windows = _windows({"asha": ["11pm-1am"], "ravi": ["10pm-2am"]})
+    assert count == 2
+    assert [(w["start"], w["end"]) for w in windows] == [(1380, 1500)]
+
+def test_each_tied_window_lists_its_own_users():
+    count, windows = _windows({"asha": ["6-8pm"], "ravi": ["7-9pm"], "meera": ["8:30-10pm"]})
+    assert count == 2
+    assert [(w["start"], w["end"], sorted(w["users"])) for w in windows] == [
+        (1140, 1200, ["asha", "ravi"]),
+        (1230, 1260, ["meera", "ravi"])
+    ]
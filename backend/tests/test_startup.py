@@ -0,0 +1,36 @@
+"""
+Cold `import main` stays within its budget and leaves the Gemini SDK
+unimported until a chat turn needs it. Run from backend/:
+
+    python -m pytest tests
+"""
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Same budget as `benchmarks/run_benchmarks.py --startup-only --max-import-seconds 1.5`
+MAX_IMPORT_SECONDS = float(os.getenv("SANCHAR_MAX_IMPORT_SECONDS", "1.5"))
+
+IMPORT_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+print(json.dumps({
+    "import_seconds": time.perf_counter() - t0,
+    "genai_imported": "google.generativeai" in sys.modules
+}))
+"""
+
+def _probe() -> dict:
+    out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def test_import_main_is_fast_and_lazy():
+    # Best of three, so one slow run on a busy machine doesn't fail the suite
+    samples = [_probe() for _ in range(3)]
+    assert not any(s["genai_imported"] for s in samples)
+    assert min(s["import_seconds"] for s in samples) <= MAX_IMPORT_SECONDS
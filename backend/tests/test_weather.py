@@ -0,0 +1,98 @@
+"""
+Weather-aware scoring with a stubbed provider. Run from backend/:
+
+    python -m pytest tests
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import enhanced_pipeline
+import weather
+from enhanced_pipeline import EnhancedRAGPipeline, WEATHER_WEIGHT
+
+PLACES = [
+    {"place_id": "indoor", "weather_suitability": "['rain', 'indoor']", "latitude": 12.9716, "longitude": 77.5946},
+    {"place_id": "outdoor", "weather_suitability": "['sunny', 'clear']", "latitude": 12.9720, "longitude": 77.5950},
+    {"place_id": "any", "weather_suitability": "['all']", "latitude": 12.9730, "longitude": 77.5960}
+]
+
+class CountingProvider(weather.WeatherProvider):
+    """Static condition that counts how often it is asked"""
+
+    def __init__(self, condition: str):
+        self.condition = condition
+        self.calls = 0
+
+    def current(self, lat: float, lon: float):
+        self.calls += 1
+        return self.condition
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    rows = [
+        dict(place, place_name=place["place_id"], category="cafe", famous_for="", area="MG Road",
+             vibe="general", budget_min=100, budget_max=300, open_time=540, close_time=1260)
+        for place in PLACES
+    ]
+    monkeypatch.setattr(enhanced_pipeline, "load_places_data", lambda: rows)
+    return EnhancedRAGPipeline()
+
+def test_stubbed_condition_flips_weather_scores(pipeline, monkeypatch):
+    lat, lon = PLACES[0]["latitude"], PLACES[0]["longitude"]
+
+    monkeypatch.setattr(weather, "current_weather", weather.CachedWeather(weather.StaticWeatherProvider("rain")))
+    rainy = pipeline._weather_vector(weather.resolve_weather(None, lat, lon))
+    assert rainy.tolist() == [WEATHER_WEIGHT, 0.0, WEATHER_WEIGHT]
+
+    monkeypatch.setattr(weather, "current_weather", weather.CachedWeather(weather.StaticWeatherProvider("sunny")))
+    sunny = pipeline._weather_vector(weather.resolve_weather(None, lat, lon))
+    assert sunny.tolist() == [0.0, WEATHER_WEIGHT, WEATHER_WEIGHT]
+
+    # The client's own weather wins over the provider's
+    assert weather.resolve_weather("drizzle", lat, lon) == "rainy"
+    assert not np.any(pipeline._weather_vector(None))
+
+def test_cached_weather_serves_repeats_per_geohash_cell():
+    provider = CountingProvider("cloudy")
+    cached = weather.CachedWeather(provider)
+
+    assert cached.current(12.9716, 77.5946) == "cloudy"
+    assert cached.current(12.9717, 77.5947) == "cloudy"  # same ~5 km cell
+    assert provider.calls == 1
+
+    assert cached.current(13.3409, 77.1010) == "cloudy"  # Tumakuru: another cell
+    assert provider.calls == 2
+
+def test_cached_weather_falls_back_when_provider_fails():
+    class FailingProvider(weather.WeatherProvider):
+        def current(self, lat, lon):
+            raise TimeoutError("upstream down")
+
+    assert weather.CachedWeather(FailingProvider()).current(12.97, 77.59) is None
+
+def test_live_ranking_path_applies_the_weather_term(pipeline):
+    def scores(condition):
+        pipeline.result_cache.clear()
+        profile = pipeline.create_user_profile_json(
+            "chill", "low", "2-4", PLACES[0]["latitude"], PLACES[0]["longitude"],
+            use_current_location=True, weather=condition
+        )
+        result = pipeline.generate_recommendations(profile)
+        return {r["place_id"]: r["preference_score"] for r in result["recommendations"]}
+
+    rainy, sunny = scores("rainy"), scores("clear")
+    assert rainy["indoor"] - sunny["indoor"] == pytest.approx(WEATHER_WEIGHT)
+    assert sunny["outdoor"] - rainy["outdoor"] == pytest.approx(WEATHER_WEIGHT)
+    assert rainy["any"] == pytest.approx(sunny["any"])
+
+@pytest.mark.parametrize("tags", [
+    "['all']",
+    "['any weather', 'rainy day friendly']",
+    "['All Seasons', 'indoor activity']"
+])
+def test_catalog_all_weather_tags_suit_every_condition(tags):
+    assert weather.suitability_bits(pd.Series([tags])).tolist() == [weather.ALL_WEATHER]
+
+def test_weather_provider_must_implement_current():
+    with pytest.raises(TypeError):
+        weather.WeatherProvider()
@@ -0,0 +1,144 @@
+"""
+Web Mercator tile index over the catalog for viewport-based map browsing.
+
+Every place gets a Morton (quadkey-order) key at INDEX_ZOOM; with places
+sorted by that key, any tile at zoom <= INDEX_ZOOM is one contiguous range
+found with two searchsorted calls, and so is every sub-cell used to
+cluster a low-zoom tile. The index is built once per catalog version and
+rendered tiles are cached by (version, z, x, y).
+"""
+import threading
+import numpy as np
+from cache import TTLCache
+from responses import dumps, etag_for
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+
+INDEX_ZOOM = 20          # finest zoom served; keys hold 2 * INDEX_ZOOM bits
+CLUSTER_BELOW_ZOOM = 14  # tiles under this zoom return clusters instead of places
+CLUSTER_GRID_BITS = 3    # clusters are cells of an 8 x 8 grid over the tile
+MAX_TILE_PLACES = 256    # denser tiles are clustered at any zoom
+MAX_MERCATOR_LAT = 85.05112878
+
+TILE_PLACE_FIELDS = ["id", "name", "category", "lat", "lon"]
+
+# Rendered tiles; keys include the catalog version, so nothing goes stale
+TILE_CACHE_MAX_ENTRIES = 4096
+TILE_CACHE_TTL_SECONDS = 3600
+TILE_MAX_AGE = 300  # browser / CDN Cache-Control for tile responses
+
+TILE_CACHE = TTLCache(TILE_CACHE_MAX_ENTRIES, TILE_CACHE_TTL_SECONDS)
+
+# -----------------------------
+# TILE KEYS
+# -----------------------------
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Insert a zero bit after each of the low 32 bits (Morton interleave helper)"""
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+def tile_xy(lat: np.ndarray, lon: np.ndarray, zoom: int) -> tuple:
+    """Integer Web Mercator tile coordinates of each point at zoom"""
+    n = 1 << zoom
+    lat_rad = np.radians(np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0 * n
+    return (np.clip(x, 0, n - 1).astype(np.int64),
+            np.clip(y, 0, n - 1).astype(np.int64))
+
+def tile_key(x, y) -> np.ndarray:
+    return _spread_bits(np.asarray(x)) | (_spread_bits(np.asarray(y)) << np.uint64(1))
+
+def key_range(z: int, x: int, y: int, zoom: int = INDEX_ZOOM) -> tuple:
+    """[start, stop) of INDEX_ZOOM keys covered by tile z/x/y (zoom <= INDEX_ZOOM)"""
+    shift = np.uint64(2 * (zoom - z))
+    start = tile_key(x, y) << shift
+    return start, start + (np.uint64(1) << shift)
+
+def valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= INDEX_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+# -----------------------------
+# INDEX + RENDERING
+# -----------------------------
+
+def build_index(pipeline) -> dict:
+    """Places sorted by INDEX_ZOOM key, with the columns a tile needs in that order"""
+    lat = np.asarray(pipeline.lat_arr, dtype=float)
+    lon = np.asarray(pipeline.lon_arr, dtype=float)
+    positions = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+    keys = tile_key(*tile_xy(lat[positions], lon[positions], INDEX_ZOOM))
+    order = np.argsort(keys, kind="stable")
+    positions = positions[order]
+    return {
+        "keys": keys[order],
+        "lat": lat[positions],
+        "lon": lon[positions],
+        "id": pipeline.strings["place_id"][positions],
+        "name": pipeline.strings["place_name"][positions],
+        "category": pipeline.strings["category"][positions]
+    }
+
+def _clusters(index: dict, start: int, stop: int, z: int) -> list:
+    """Group a tile's places by cell of a 2^CLUSTER_GRID_BITS grid; centroid + count per cell"""
+    cell_zoom = min(z + CLUSTER_GRID_BITS, INDEX_ZOOM)
+    cells = index["keys"][start:stop] >> np.uint64(2 * (INDEX_ZOOM - cell_zoom))
+    # Keys are sorted, so each cell is a contiguous run
+    firsts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+    counts = np.diff(np.r_[firsts, cells.size])
+    lat = np.add.reduceat(index["lat"][start:stop], firsts) / counts
+    lon = np.add.reduceat(index["lon"][start:stop], firsts) / counts
+    return [
+        {"lat": round(float(lat[i]), 6), "lon": round(float(lon[i]), 6), "count": int(counts[i])}
+        for i in range(firsts.size)
+    ]
+
+def render_tile(index: dict, version: str, z: int, x: int, y: int) -> dict:
+    keys = index["keys"]
+    lo, hi = key_range(z, x, y)
+    start = int(np.searchsorted(keys, lo, side="left"))
+    stop = int(np.searchsorted(keys, hi, side="left"))
+
+    tile = {"z": z, "x": x, "y": y, "catalog_version": version, "count": stop - start}
+    if z < CLUSTER_BELOW_ZOOM or stop - start > MAX_TILE_PLACES:
+        tile["clusters"] = _clusters(index, start, stop, z) if stop > start else []
+        return tile
+
+    tile["fields"] = TILE_PLACE_FIELDS
+    tile["places"] = [
+        [index["id"][i], index["name"][i], index["category"][i],
+         round(float(index["lat"][i]), 6), round(float(index["lon"][i]), 6)]
+        for i in range(start, stop)
+    ]
+    return tile
+
+_index = {"version": None, "index": None}
+_index_lock = threading.Lock()
+
+def tile_index(pipeline) -> tuple:
+    """(catalog version, index), built once per catalog version"""
+    with _index_lock:
+        version = pipeline.catalog_version
+        if _index["version"] != version:
+            _index["index"] = build_index(pipeline)
+            _index["version"] = version
+        return version, _index["index"]
+
+def tile_body(pipeline, z: int, x: int, y: int) -> tuple:
+    """(serialized tile, ETag); tiles of older catalog versions age out of the LRU"""
+    version, index = tile_index(pipeline)
+    key = (version, z, x, y)
+    cached = TILE_CACHE.get(key)
+    if cached is None:
+        body = dumps(render_tile(index, version, z, x, y))
+        cached = (body, etag_for(body))
+        TILE_CACHE.set(key, cached)
+    return cached
@@ -0,0 +1,164 @@
+"""
+Current weather for weather-aware ranking.
+
+Places carry a bitmask over WEATHER_CONDITIONS (built once per catalog
+from weather_suitability); ranking for a condition is then a single AND
+against that mask. The current condition comes from the request, or from
+the configured provider through a per-area TTL cache:
+
+    SANCHAR_WEATHER_PROVIDER=open-meteo    # live lookups (no API key)
+    SANCHAR_WEATHER_PROVIDER=static:rainy  # fixed condition, for local runs
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import Optional
+import numpy as np
+import pandas as pd
+import outbound
+from cache import TTLCache
+from helpers import geohash_encode
+from logger import get_logger, fields
+
+log = get_logger("weather")
+
+# -----------------------------
+# CONDITIONS
+# -----------------------------
+
+# Condition -> keywords that mark a weather_suitability tag as suiting it.
+# Bit i of a place's mask is WEATHER_CONDITIONS' i-th key.
+WEATHER_CONDITIONS = {
+    "clear": ["clear", "sunny"],
+    "cloudy": ["cloudy", "overcast"],
+    "rainy": ["rain", "indoor"],
+    "hot": ["hot", "warm"],
+    "cool": ["cool", "pleasant", "winter"]
+}
+WEATHER_BITS = {condition: 1 << i for i, condition in enumerate(WEATHER_CONDITIONS)}
+ALL_WEATHER = sum(WEATHER_BITS.values())
+
+# weather_suitability tags that suit every condition: the legacy "all" tag
+# (see helpers.weather_score) and the catalog's own phrasings
+ALL_WEATHER_TAGS = ["'all'", "any weather", "all seasons"]
+
+# Free-text / client weather words -> condition
+WEATHER_ALIASES = {
+    "sun": "clear", "sunny": "clear", "clear": "clear",
+    "cloud": "cloudy", "cloudy": "cloudy", "overcast": "cloudy",
+    "rain": "rainy", "rainy": "rainy", "drizzle": "rainy", "storm": "rainy", "thunderstorm": "rainy",
+    "hot": "hot", "warm": "hot",
+    "cool": "cool", "cold": "cool", "pleasant": "cool"
+}
+
+def normalize_condition(weather: Optional[str]) -> Optional[str]:
+    """Map a client or provider weather description to a WEATHER_CONDITIONS key"""
+    if not weather:
+        return None
+    text = weather.strip().lower()
+    if text in WEATHER_CONDITIONS:
+        return text
+    for word in text.replace("-", " ").split():
+        if word in WEATHER_ALIASES:
+            return WEATHER_ALIASES[word]
+    return None
+
+def suitability_bits(suitability: pd.Series) -> np.ndarray:
+    """Per-place condition bitmask from raw weather_suitability strings (no list parsing)"""
+    text = suitability.fillna("").astype(str).str.lower()
+    bits = np.zeros(len(text), dtype=np.uint8)
+    for condition, keywords in WEATHER_CONDITIONS.items():
+        matches = np.zeros(len(text), dtype=bool)
+        for keyword in keywords:
+            matches |= text.str.contains(keyword, regex=False).to_numpy(dtype=bool)
+        bits[matches] |= WEATHER_BITS[condition]
+    for tag in ALL_WEATHER_TAGS:
+        bits[text.str.contains(tag, regex=False).to_numpy(dtype=bool)] = ALL_WEATHER
+    return bits
+
+# -----------------------------
+# PROVIDERS
+# -----------------------------
+
+WEATHER_PROVIDER = os.getenv("SANCHAR_WEATHER_PROVIDER", "")
+WEATHER_CACHE_GEOHASH_PRECISION = 5  # ~5 km cells share one lookup
+WEATHER_CACHE_MAX_ENTRIES = 1024
+WEATHER_CACHE_TTL_SECONDS = 900
+
+class WeatherProvider(ABC):
+    """Returns the current WEATHER_CONDITIONS key at a point, or None if unknown"""
+
+    @abstractmethod
+    def current(self, lat: float, lon: float) -> Optional[str]:
+        ...
+
+class StaticWeatherProvider(WeatherProvider):
+    """Same condition everywhere; for local runs and benchmarks"""
+
+    def __init__(self, condition: Optional[str]):
+        self.condition = normalize_condition(condition)
+
+    def current(self, lat: float, lon: float) -> Optional[str]:
+        return self.condition
+
+class OpenMeteoWeatherProvider(WeatherProvider):
+    """Open-Meteo current weather, through the shared outbound layer"""
+
+    def current(self, lat: float, lon: float) -> Optional[str]:
+        response = outbound.request(
+            "open_meteo", "GET", "/forecast",
+            params={"latitude": round(lat, 3), "longitude": round(lon, 3),
+                    "current": "weather_code,temperature_2m"}
+        )
+        current = response.json().get("current", {})
+        return self._condition(current.get("weather_code"), current.get("temperature_2m"))
+
+    @staticmethod
+    def _condition(code, temperature) -> Optional[str]:
+        """WMO weather code (+ temperature) -> condition"""
+        if code is None:
+            return None
+        if code >= 51:  # drizzle, rain, snow, showers, thunderstorms
+            return "rainy"
+        if temperature is not None and temperature >= 32:
+            return "hot"
+        if code >= 2:  # partly cloudy, overcast, fog
+            return "cloudy"
+        if temperature is not None and temperature <= 20:
+            return "cool"
+        return "clear"
+
+class CachedWeather:
+    """Per-area TTL cache in front of a provider; failures fall back to None"""
+
+    def __init__(self, provider: Optional[WeatherProvider]):
+        self.provider = provider
+        self.cache = TTLCache(WEATHER_CACHE_MAX_ENTRIES, WEATHER_CACHE_TTL_SECONDS)
+
+    def current(self, lat: float, lon: float) -> Optional[str]:
+        if self.provider is None:
+            return None
+        area = geohash_encode(lat, lon, WEATHER_CACHE_GEOHASH_PRECISION)
+        cached = self.cache.get(area)
+        if cached is not None:
+            return cached or None
+        try:
+            condition = self.provider.current(lat, lon)
+        except Exception as e:
+            log.warning("weather.unavailable", extra=fields(area=area, error=repr(e)))
+            return None
+        # "" caches "unknown" so a provider without an answer isn't re-asked every request
+        self.cache.set(area, condition or "")
+        return condition
+
+def make_provider(spec: str) -> Optional[WeatherProvider]:
+    if spec == "open-meteo":
+        return OpenMeteoWeatherProvider()
+    if spec.startswith("static:"):
+        return StaticWeatherProvider(spec.split(":", 1)[1])
+    return None
+
+current_weather = CachedWeather(make_provider(WEATHER_PROVIDER))
+
+def resolve_weather(requested: Optional[str], lat: float, lon: float) -> Optional[str]:
+    """The client's weather if it names a known condition, else the provider's"""
+    return normalize_condition(requested) or current_weather.current(lat, lon)